@@ -9,57 +9,216 @@ bl_info = {
     "category": "Add Curve",
 }
 
-import bpy, math
+import bpy, os, math, time, operator, json, hashlib, shutil
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from mathutils import Vector, Quaternion
-from bpy.props import FloatProperty, BoolProperty, IntProperty, EnumProperty
+from bpy.props import FloatProperty, BoolProperty, IntProperty, EnumProperty, PointerProperty, StringProperty
+from bpy.app.handlers import persistent
 
 HIDDEN_COLLECTION_NAME = '_HIDDEN_BEVEL_OBJECTS'
 
-def is_greater_than_280():
-    if bpy.app.version >= (2, 80, 0):
-        return True
-    return False
+# Custom property of bevel objects stored by the add-on, it points to the curve object owning them
+BEVEL_OWNER_KEY = 'bevel_owner'
 
-def is_greater_than_291():
-    if bpy.app.version >= (2, 91, 0):
-        return True
-    return False
+# Node group holding custom radius falloff curve
+FALLOFF_GROUP_NAME = '.bevel_curve_tools_falloff'
+
+# Custom properties holding full resolution state while proxy mode is on.
+# Resolutions are kept as (full, proxy) pairs, profiles as both curve datas
+PROXY_RESOLUTION_KEY = 'bevel_proxy_resolution_u'
+PROXY_RENDER_RESOLUTION_KEY = 'bevel_proxy_render_resolution_u'
+PROXY_FULL_DATA_KEY = 'bevel_proxy_full_data'
+PROXY_DATA_KEY = 'bevel_proxy_data'
+PROXY_POINTS_KEY = 'bevel_proxy_points'
+
+# Memory cap of evaluated curves, see CurveCache
+CURVE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Baked meshes of converted curves, stored beside the blend file as one blob plus a json index
+MESH_CACHE_VERSION = 2
+MESH_CACHE_EXT = '.bevelcache'
+MESH_CACHE_KEY = 'bevel_cache_key'
+MESH_CACHE_UV_KEY = 'bevel_cache_uv'
+# Least recently used entries not baked into any mesh are dropped past this size
+MESH_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+MESH_CACHE_ARRAYS = (
+        ('co', np.float32), ('loop_starts', np.int32), ('loop_totals', np.int32),
+        ('loop_verts', np.int32), ('face_materials', np.int32), ('uvs', np.float32))
+
+# User bevel profiles, stored in Blender config folder so every file shares them
+PROFILE_LIBRARY_DIR = 'bevel_curve_tools'
+PROFILE_LIBRARY_FILE = 'bevel_profiles.npz'
+
+# Size of the bigger side of saved profiles, same as predefined shapes
+PROFILE_SIZE = 0.1
+
+# Splines are swept in batches of about this many samples, batches don't depend on thread count
+SWEEP_BATCH_ROWS = 4096
+
+# Curves whose raw evaluated meshes are held at once while merging, at least one per thread
+MERGE_BATCH_CURVES = 16
+
+# Beveled curves spanning more spatial index cells than this are tested on every query instead
+SPATIAL_MAX_OBJECT_CELLS = 512
+
+# Version checks are done once, helpers below are defined for the running Blender only
+BLENDER_280 = bpy.app.version >= (2, 80, 0)
+BLENDER_291 = bpy.app.version >= (2, 91, 0)
+BLENDER_400 = bpy.app.version >= (4, 0, 0)
+
+if BLENDER_280:
+
+    mul = operator.matmul
 
-def set_active_object(obj):
-    if is_greater_than_280():
+    def set_active_object(obj):
         bpy.context.view_layer.objects.active = obj
-    else: bpy.context.scene.objects.active = obj
 
-def get_object_select(obj):
-    if is_greater_than_280():
+    def get_object_select(obj):
         try: return obj.select_get()
         except: return False
-    else: return obj.select
 
-def set_object_select(obj, val):
-    if is_greater_than_280():
+    def set_object_select(obj, val):
         obj.select_set(val)
-    else: obj.select = val
 
-def mul(A, B):
-    if is_greater_than_280():
-        return A @ B
-    else: return A * B
-
-def hide_object(obj, val):
-    if is_greater_than_280():
+    def hide_object(obj, val):
         obj.hide_viewport = val
-    else: obj.hide = val
 
-def link_object(scene, obj):
-    if is_greater_than_280():
+    def link_object(scene, obj):
         scene.collection.objects.link(obj)
-    else: scene.objects.link(obj)
 
-def get_scene_objects():
-    if is_greater_than_280():
+    def get_scene_objects():
         return bpy.context.view_layer.objects
-    else: return bpy.context.scene.objects
+
+    def get_evaluated_object(context, obj):
+        return obj.evaluated_get(context.evaluated_depsgraph_get())
+
+    def get_cursor_location(context):
+        return context.scene.cursor.location
+
+    def link_new_bevel_object(scene, obj):
+        # Bevel objects only go to the bevel collection when stored
+        pass
+
+    def store_in_bevel_place(scene, obj):
+        try: get_bevel_collection(scene).objects.link(obj)
+        except RuntimeError:
+            # Already in the collection
+            pass
+
+    def show_bevel_place(context, obj):
+        set_bevel_collection_visible(context, True)
+
+    def hide_bevel_place(context):
+        set_bevel_collection_visible(context, False)
+
+    def link_lod_object(scene, obj, level):
+        # Group levels consistently, one collection per level
+        get_lod_collection(scene, level).objects.link(obj)
+
+    def hide_curve_normals(curve):
+        pass
+
+    def get_tool_panel_class():
+        return VIEW3D_PT_YBevelCurveToolUIPanel
+
+    # Depsgraph updates tell when cached data is stale, evaluated meshes can be read without objects
+    HAS_DEPSGRAPH = True
+
+    HIDE_ICON = 'HIDE_ON'
+    SELECT_OVERLAPPING_ICON = 'SELECT_EXTEND'
+    SELECT_NEAREST_ICON = 'PIVOT_CURSOR'
+
+    # Curve offset no longer includes the base width
+    CURVE_OFFSET_DEFAULT = 0.0
+
+else:
+
+    mul = operator.mul
+
+    def set_active_object(obj):
+        bpy.context.scene.objects.active = obj
+
+    def get_object_select(obj):
+        return obj.select
+
+    def set_object_select(obj, val):
+        obj.select = val
+
+    def hide_object(obj, val):
+        obj.hide = val
+
+    def link_object(scene, obj):
+        scene.objects.link(obj)
+
+    def get_scene_objects():
+        return bpy.context.scene.objects
+
+    def get_evaluated_object(context, obj):
+        return obj
+
+    def get_cursor_location(context):
+        return context.scene.cursor_location
+
+    def link_new_bevel_object(scene, obj):
+        link_object(scene, obj)
+
+    def store_in_bevel_place(scene, obj):
+        # Only layer 20
+        obj.layers[19] = True
+        for i in range(19):
+            obj.layers[i] = False
+
+    def show_bevel_place(context, obj):
+        # Show bevel object on active layer
+        for i in range(20):
+            obj.layers[i] = context.scene.layers[i]
+
+    def hide_bevel_place(context):
+        pass
+
+    def link_lod_object(scene, obj, level):
+        link_object(scene, obj)
+
+    def hide_curve_normals(curve):
+        curve.show_normal_face = False
+
+    def get_tool_panel_class():
+        return YBevelCurveToolPanel
+
+    HAS_DEPSGRAPH = False
+
+    CURVE_OFFSET_DEFAULT = 1.0
+
+    HIDE_ICON = 'VISIBLE_IPO_OFF'
+    SELECT_OVERLAPPING_ICON = 'ROTATECOLLECTION'
+    SELECT_NEAREST_ICON = 'CURSOR'
+
+if BLENDER_291:
+
+    def set_bevel_mode_object(curve):
+        curve.bevel_mode = 'OBJECT'
+
+else:
+
+    def set_bevel_mode_object(curve):
+        # Bevel object is used whenever it's set
+        pass
+
+if BLENDER_400:
+
+    def set_polygon_loop_totals(mesh, loop_totals):
+        # Derived from loop starts
+        pass
+
+else:
+
+    def set_polygon_loop_totals(mesh, loop_totals):
+        mesh.polygons.foreach_set('loop_total', np.ascontiguousarray(loop_totals, dtype=np.int32))
+
+# ID property tagging collections made for LOD levels, the value is the level
+LOD_COLLECTION_KEY = 'bevel_lod_level'
 
 def get_set_collection(collection_name, parent_collection=None):
     if collection_name in bpy.data.collections: # Does the collection already exist?
@@ -69,23 +228,123 @@ def get_set_collection(collection_name, parent_collection=None):
         if parent_collection: parent_collection.children.link(new_collection) # Add the new collection under a parent
         return new_collection
 
-def radius_falloff(points, power = 1.0, tip = 'ONE'):
-    total_points = len(points)
-    for i, point in enumerate(points):
-        dist = i/(total_points-1)
-        if tip == 'ONE':
-            radius_weight = max(1.0 - pow(dist, power), 0.01)
-        elif tip == 'DUAL':
-            if dist >= 0.5:
-                dist = (dist - 0.5) * 2.0
-                radius_weight = max(1.0 - pow(dist, power), 0.01)
+# Falloff tip of bevel operators to falloff weight mode
+FALLOFF_TIPS = {'NOTIP' : 'NO', 'ONETIP' : 'ONE', 'DUALTIP' : 'DUAL', 'CURVE' : 'CURVE'}
+
+def falloff_weights(t, tip='ONE', power=1.0, lut=None):
+    """ Radius weights for parameters t in [0, 1], lut is sampled evenly over [0, 1] for 'CURVE' """
+    t = np.clip(t, 0.0, 1.0)
+    if tip == 'NO':
+        return np.ones_like(t)
+
+    if tip == 'CURVE':
+        weights = np.interp(t, np.linspace(0.0, 1.0, len(lut)), lut)
+    elif tip == 'DUAL':
+        # Grow to the middle then shrink back
+        upper = t >= 0.5
+        dist = np.where(upper, (t - 0.5) * 2.0, t * 2.0)
+        weights = np.where(upper, 1.0 - dist ** power, dist ** (1.0 / power))
+    else: weights = 1.0 - t ** power
+
+    return np.maximum(weights, 0.01)
+
+def spline_parameters(counts, co=None):
+    """ Parameter in [0, 1] of every point along its spline, points of all splines concatenated.
+    Uses point index, or distance along control points if co is given """
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    spline_ids = np.repeat(np.arange(len(counts)), counts)
+    first = offsets[:-1][spline_ids]
+    last = offsets[1:][spline_ids] - 1
+    local = np.arange(offsets[-1]) - first
+
+    by_index = local / np.maximum(last - first, 1)
+    if co is None:
+        return by_index
+
+    seg = np.zeros(offsets[-1], dtype=np.float64)
+    seg[1:] = np.linalg.norm(np.diff(co, axis=0), axis=1)
+    seg[offsets[:-1][counts > 0]] = 0.0
+    dist = np.cumsum(seg)
+    dist -= dist[first]
+    length = dist[last]
+
+    # Splines with all points at one place fall back to index
+    valid = length > 1e-12
+    return np.where(valid, dist / np.where(valid, length, 1.0), by_index)
+
+def apply_radius_falloff(curves, tip='ONE', power=1.0, use_arc_length=False, lut=None):
+    """ Set point radius of every spline of curves data from falloff weights, in bulk.
+    Returns number of points changed """
+    splines = [s for c in curves for s in c.splines]
+    counts = np.array([len(get_spline_points(s)) for s in splines], dtype=np.int64)
+    total = counts.sum()
+    if not total:
+        return 0
+
+    co = None
+    if use_arc_length:
+        co = np.empty((total, 3), dtype=np.float32)
+        start = 0
+        for spline, count in zip(splines, counts):
+            if spline.type == 'BEZIER':
+                buf = np.empty(count * 3, dtype=np.float32)
+                spline.bezier_points.foreach_get('co', buf)
+                co[start:start + count] = buf.reshape(-1, 3)
             else:
-                dist = dist * 2.0
-                radius_weight = max(pow(dist, 1/power), 0.01)
-        elif tip == 'NO':
-            radius_weight = 1.0
-        #print(dist, radius_weight)
-        point.radius = radius_weight
+                buf = np.empty(count * 4, dtype=np.float32)
+                spline.points.foreach_get('co', buf)
+                co[start:start + count] = buf.reshape(-1, 4)[:, :3]
+            start += count
+
+    weights = falloff_weights(spline_parameters(counts, co), tip, power, lut).astype(np.float32)
+
+    start = 0
+    for spline, count in zip(splines, counts):
+        get_spline_points(spline).foreach_set('radius', weights[start:start + count])
+        start += count
+
+    for c in curves:
+        invalidate_curve_evaluation(c)
+
+    return int(total)
+
+def get_falloff_curve_node(create=False):
+    """ Curve node holding custom falloff mapping, kept in a hidden node group """
+    group = bpy.data.node_groups.get(FALLOFF_GROUP_NAME)
+    if not group:
+        if not create:
+            return None
+        group = bpy.data.node_groups.new(FALLOFF_GROUP_NAME, 'ShaderNodeTree')
+        group.use_fake_user = True
+
+    node = group.nodes.get('Falloff')
+    if not node:
+        if not create:
+            return None
+        node = group.nodes.new('ShaderNodeRGBCurve')
+        node.name = 'Falloff'
+
+        # Start from one tip falloff
+        points = node.mapping.curves[3].points
+        points[0].location = (0.0, 1.0)
+        points[1].location = (1.0, 0.0)
+        node.mapping.update()
+
+    return node
+
+def get_falloff_lut(samples=256):
+    """ Custom falloff curve sampled evenly over [0, 1] """
+    node = get_falloff_curve_node(create=True)
+    mapping = node.mapping
+    curve_map = mapping.curves[3]
+    xs = np.linspace(0.0, 1.0, samples)
+
+    # Blender 2.82 moved evaluate from curve map to curve mapping
+    if hasattr(mapping, 'evaluate'):
+        mapping.initialize()
+        return np.array([mapping.evaluate(curve_map, x) for x in xs])
+    return np.array([curve_map.evaluate(x) for x in xs])
 
 def get_spline_points(spline):
     # Points for griffindor
@@ -98,13 +357,1138 @@ def get_spline_points(spline):
 
 def get_point_position(curve_obj, index=0, spline_index=0):
     curve_mat = curve_obj.matrix_world
+    samples = get_curve_evaluation(curve_obj.data).samples
+    co = samples.point_co[samples.point_offsets[spline_index] + index]
+    return mul(curve_mat, Vector(co))
+
+def key_curve_weights(fac, interpolation):
+    """ Blender's 4 point weights used to interpolate radius and tilt of bezier splines """
+    fac = np.asarray(fac, dtype=np.float64)
+    if interpolation == 'EASE':
+        fac = 3.0 * fac * fac - 2.0 * fac * fac * fac
+        interpolation = 'LINEAR'
+
+    t2 = fac * fac
+    t3 = t2 * fac
+
+    if interpolation == 'CARDINAL':
+        fc = 0.71
+        return np.stack((
+            -fc * t3 + 2.0 * fc * t2 - fc * fac,
+            (2.0 - fc) * t3 + (fc - 3.0) * t2 + 1.0,
+            (fc - 2.0) * t3 + (3.0 - 2.0 * fc) * t2 + fc * fac,
+            fc * t3 - fc * t2), axis=-1)
+
+    if interpolation == 'BSPLINE':
+        return np.stack((
+            -0.16666666 * t3 + 0.5 * t2 - 0.5 * fac + 0.16666666,
+            0.5 * t3 - t2 + 0.66666666,
+            -0.5 * t3 + 0.5 * t2 + 0.5 * fac + 0.16666666,
+            0.16666666 * t3), axis=-1)
+
+    zeros = np.zeros_like(fac)
+    return np.stack((zeros, 1.0 - fac, fac, zeros), axis=-1)
+
+def bezier_eval(ctrl, t):
+    """ Batched de Casteljau evaluation of cubic bezier segments.
+    ctrl is (segments, 4, dim), t is (samples,) or (segments, samples).
+    Returns positions and first derivatives, both (segments, samples, dim) """
+    ctrl = np.asarray(ctrl, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    if t.ndim == 1:
+        t = np.broadcast_to(t, (ctrl.shape[0], t.shape[0]))
+    t = t[:, :, None]
+    s = 1.0 - t
+
+    p0 = ctrl[:, None, 0]
+    p1 = ctrl[:, None, 1]
+    p2 = ctrl[:, None, 2]
+    p3 = ctrl[:, None, 3]
+
+    a = s * p0 + t * p1
+    b = s * p1 + t * p2
+    c = s * p2 + t * p3
+    d = s * a + t * b
+    e = s * b + t * c
+
+    return s * d + t * e, 3.0 * (e - d)
+
+def nurbs_knots(count, order, use_endpoint=False, use_bezier=False, use_cyclic=False):
+    """ Knot vector the way Blender builds it, count is number of points not corrected for cyclic """
+    if use_cyclic:
+        # Cyclic splines are always uniform, wrapped by order - 1 points
+        return np.arange(count + order * 2 - 1, dtype=np.float64)
+
+    total = count + order
+    knots = np.empty(total, dtype=np.float64)
+
+    if use_endpoint:
+        k = 0.0
+        for a in range(1, total + 1):
+            knots[a - 1] = k
+            if a >= order and a <= count:
+                k += 1.0
+    elif use_bezier and order == 4:
+        k = 0.34
+        for a in range(total):
+            knots[a] = math.floor(k)
+            k += 1.0 / 3.0
+    elif use_bezier and order == 3:
+        k = 0.6
+        for a in range(total):
+            if a >= order and a <= count:
+                k += 0.5
+            knots[a] = math.floor(k)
+    else:
+        knots[:] = np.arange(total)
+
+    return knots
+
+def de_boor(ctrl, knots, u, order):
+    """ Batched de Boor evaluation, one span per sample.
+    ctrl is (samples, order, dim) points of the span, knots is (samples, 2 * (order - 1))
+    knots around the span and u is (samples,) parameter.
+    Returns positions and first derivatives, both (samples, dim) """
+    p = order - 1
+    d = [np.array(ctrl[:, j], dtype=np.float64) for j in range(order)]
+    deriv = np.zeros_like(d[0])
+
+    for r in range(1, p + 1):
+        if r == p:
+            # Tangent comes from the last two points before the final blend
+            denom = knots[:, p] - knots[:, p - 1]
+            safe = np.where(denom > 0.0, denom, 1.0)
+            deriv = p * (d[p] - d[p - 1]) / safe[:, None]
+        for j in range(p, r - 1, -1):
+            lo = knots[:, j - 1]
+            denom = knots[:, j + p - r] - lo
+            safe = np.where(denom > 0.0, denom, 1.0)
+            alpha = np.where(denom > 0.0, (u - lo) / safe, 0.0)[:, None]
+            d[j] = (1.0 - alpha) * d[j - 1] + alpha * d[j]
+
+    return d[p], deriv
+
+class CurveSamples:
+    """ Evaluated samples of every spline of a curve in object space.
+    Rows offsets[i]:offsets[i+1] belong to spline i, point_samples holds the sample row
+    of every control point, indexed through point_offsets like point_co and point_radii """
+
+    def __init__(self, positions, derivatives, radii, tilts, offsets, cyclic, point_samples, point_offsets,
+            point_co=None, point_radii=None):
+        self.positions = positions
+        self.derivatives = derivatives
+        self.radii = radii
+        self.tilts = tilts
+        self.offsets = offsets
+        self.cyclic = cyclic
+        self.point_samples = point_samples
+        self.point_offsets = point_offsets
+        self.point_co = point_co
+        self.point_radii = point_radii
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def spline_count(self):
+        return len(self.offsets) - 1
+
+    def spline_slice(self, spline_index):
+        return slice(self.offsets[spline_index], self.offsets[spline_index + 1])
+
+    def point_sample(self, index=0, spline_index=0):
+        return self.point_samples[self.point_offsets[spline_index] + index]
+
+    def spline_points(self, spline_index):
+        return slice(self.point_offsets[spline_index], self.point_offsets[spline_index + 1])
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in vars(self).values() if isinstance(a, np.ndarray))
+
+def spline_rows(offsets, spline_indices):
+    """ Concatenated sample rows of the given splines """
+    if not len(spline_indices):
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in spline_indices])
+
+def read_spline_points(spline):
+    """ Bulk read of spline points, returns (co, radius, tilt) arrays.
+    co is (n, 4) for poly and nurbs splines, and (n, 3, 3) holding left handle,
+    point and right handle for bezier splines """
+    points = get_spline_points(spline)
+    n = len(points)
+    radius = np.empty(n, dtype=np.float32)
+    tilt = np.empty(n, dtype=np.float32)
+    points.foreach_get('radius', radius)
+    points.foreach_get('tilt', tilt)
+
+    if spline.type == 'BEZIER':
+        co = np.empty((n, 3, 3), dtype=np.float32)
+        for i, attr in enumerate(('handle_left', 'co', 'handle_right')):
+            buf = np.empty(n * 3, dtype=np.float32)
+            points.foreach_get(attr, buf)
+            co[:, i] = buf.reshape(n, 3)
+    else:
+        co = np.empty(n * 4, dtype=np.float32)
+        points.foreach_get('co', co)
+        co = co.reshape(n, 4)
+
+    return co, radius, tilt
+
+def evaluate_curve(curve, resolution=None):
+    """ Sample all splines of curve data in object space, the same way Blender's converter does.
+    All bezier segments are evaluated in one call, nurbs splines in one call per order """
+    splines = curve.splines
+    spline_count = len(splines)
+
+    counts = np.zeros(spline_count, dtype=np.int64)
+    cyclic = np.zeros(spline_count, dtype=bool)
+    point_counts = np.zeros(spline_count, dtype=np.int64)
+
+    bez_items = []
+    nurbs_items = {}
+    poly_items = []
+    point_co = []
+    point_radii = []
+
+    for i, spline in enumerate(splines):
+        co, radius, tilt = read_spline_points(spline)
+        n = len(radius)
+        point_co.append(co[:, 1] if spline.type == 'BEZIER' else co[:, :3])
+        point_radii.append(radius)
+        res = resolution if resolution else spline.resolution_u
+        res = max(int(res), 1)
+        cyclic[i] = spline.use_cyclic_u
+        point_counts[i] = n
+
+        if spline.type == 'BEZIER':
+            if n < 2: continue
+            segs = n if spline.use_cyclic_u else n - 1
+            # Segment between two vector handles is a straight line, Blender gives it one sample
+            vector = np.array([bp.handle_right_type == 'VECTOR' for bp in spline.bezier_points])
+            vector_left = np.array([bp.handle_left_type == 'VECTOR' for bp in spline.bezier_points])
+            a = np.arange(segs)
+            b = (a + 1) % n
+            steps = np.where(vector[a] & vector_left[b], 1, res)
+            counts[i] = steps.sum() + (0 if spline.use_cyclic_u else 1)
+            bez_items.append((i, co, radius, tilt, steps, spline.radius_interpolation, spline.tilt_interpolation))
+
+        elif spline.type == 'NURBS':
+            order = min(spline.order_u, n)
+            if n < 2 or order < 2: continue
+            segs = n if spline.use_cyclic_u else n - 1
+            counts[i] = res * segs
+            nurbs_items.setdefault(order, []).append((i, co, radius, tilt, res, spline))
+
+        else:
+            if n < 2: continue
+            counts[i] = n
+            poly_items.append((i, co, radius, tilt))
+
+    offsets = np.zeros(spline_count + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total = offsets[-1]
+
+    positions = np.zeros((total, 3), dtype=np.float64)
+    derivatives = np.zeros((total, 3), dtype=np.float64)
+    radii = np.zeros(total, dtype=np.float64)
+    tilts = np.zeros(total, dtype=np.float64)
+
+    point_offsets = np.zeros(spline_count + 1, dtype=np.int64)
+    np.cumsum(point_counts, out=point_offsets[1:])
+    point_samples = np.zeros(point_offsets[-1], dtype=np.int64)
+
+    # Bezier
+    if bez_items:
+        ctrl = []
+        attrs = []
+        steps_all = []
+        closing = []
+        interps = []
+        for i, co, radius, tilt, steps, rad_interp, tilt_interp in bez_items:
+            n = len(radius)
+            segs = len(steps)
+            a = np.arange(segs)
+            b = (a + 1) % n
+            if cyclic[i]:
+                prev = (a - 1) % n
+                nxt = (b + 1) % n
+            else:
+                prev = np.maximum(a - 1, 0)
+                nxt = np.minimum(b + 1, n - 1)
+            ctrl.append(np.stack((co[a, 1], co[a, 2], co[b, 0], co[b, 1]), axis=1))
+            attrs.append(np.stack((
+                np.stack((radius[prev], radius[a], radius[b], radius[nxt]), axis=1),
+                np.stack((tilt[prev], tilt[a], tilt[b], tilt[nxt]), axis=1)), axis=1))
+            steps_all.append(steps)
+            last = np.zeros(segs, dtype=bool)
+            if not cyclic[i]: last[-1] = True
+            closing.append(last)
+            interps.extend([(rad_interp, tilt_interp)] * segs)
+
+            # Sample row of every control point
+            ps = np.zeros(n, dtype=np.int64)
+            np.cumsum(steps[:n - 1], out=ps[1:])
+            point_samples[point_offsets[i]:point_offsets[i + 1]] = offsets[i] + ps
+
+        ctrl = np.concatenate(ctrl)
+        attrs = np.concatenate(attrs)
+        steps = np.concatenate(steps_all)
+        closing = np.concatenate(closing)
+
+        # Padded parameter grid, the closing point of open splines sits at t = 1
+        width = steps.max() + 1
+        j = np.arange(width)[None, :]
+        t = j / steps[:, None]
+        valid = (j < steps[:, None]) | ((j == steps[:, None]) & closing[:, None])
+        t = np.minimum(t, 1.0)
+
+        pos, der = bezier_eval(ctrl, t)
+
+        # Radius and tilt, one weight set per interpolation mode in use
+        rad = np.zeros(t.shape, dtype=np.float64)
+        til = np.zeros(t.shape, dtype=np.float64)
+        rad_modes = np.array([m[0] for m in interps])
+        tilt_modes = np.array([m[1] for m in interps])
+        for mode in set(rad_modes) | set(tilt_modes):
+            w = key_curve_weights(t, mode)
+            rmask = rad_modes == mode
+            tmask = tilt_modes == mode
+            rad[rmask] = np.einsum('stk,sk->st', w[rmask], attrs[rmask, 0])
+            til[tmask] = np.einsum('stk,sk->st', w[tmask], attrs[tmask, 1])
+
+        # Straight segments and closing points take point values directly
+        straight = steps == 1
+        rad[straight, 0] = attrs[straight, 0, 1]
+        til[straight, 0] = attrs[straight, 1, 1]
+        closing_rows = np.nonzero(closing)[0]
+        closing_cols = steps[closing_rows]
+        rad[closing_rows, closing_cols] = attrs[closing_rows, 0, 2]
+        til[closing_rows, closing_cols] = attrs[closing_rows, 1, 2]
+
+        rows = spline_rows(offsets, [item[0] for item in bez_items])
+        positions[rows] = pos[valid]
+        derivatives[rows] = der[valid]
+        radii[rows] = rad[valid]
+        tilts[rows] = til[valid]
+
+    # Nurbs, one de Boor call per order
+    for order, items in nurbs_items.items():
+        p = order - 1
+        ctrl_all = []
+        knots_all = []
+        spans = []
+        params = []
+        ctrl_offset = 0
+        knot_offset = 0
+        for i, co, radius, tilt, res, spline in items:
+            n = len(radius)
+            w = co[:, 3:4].astype(np.float64)
+            # Homogeneous coordinates, radius and tilt follow the same basis
+            hom = np.hstack((co[:, :3] * w, w, radius[:, None] * w, tilt[:, None] * w))
+            if cyclic[i]:
+                hom = np.vstack((hom, hom[:order - 1]))
+            knots = nurbs_knots(n, order, spline.use_endpoint_u, spline.use_bezier_u, cyclic[i])
+            count = counts[i]
+            ustart = knots[order - 1]
+            uend = knots[len(hom)]
+            if cyclic[i]:
+                u = ustart + (uend - ustart) * np.arange(count) / count
+            else: u = np.linspace(ustart, uend, count)
+            k = np.searchsorted(knots, u, side='right') - 1
+            k = np.clip(k, order - 1, len(hom) - 1)
+
+            ctrl_all.append(hom)
+            knots_all.append(knots)
+            spans.append((k + ctrl_offset, k + knot_offset))
+            params.append(u)
+            ctrl_offset += len(hom)
+            knot_offset += len(knots)
+
+            ps = np.minimum(np.arange(n) * res, count - 1)
+            point_samples[point_offsets[i]:point_offsets[i + 1]] = offsets[i] + ps
+
+        ctrl_all = np.concatenate(ctrl_all)
+        knots_all = np.concatenate(knots_all)
+        ctrl_span = np.concatenate([s[0] for s in spans])
+        knot_span = np.concatenate([s[1] for s in spans])
+        u = np.concatenate(params)
+
+        hom, dhom = de_boor(
+                ctrl_all[ctrl_span[:, None] + np.arange(-p, 1)],
+                knots_all[knot_span[:, None] + np.arange(-p + 1, p + 1)],
+                u, order)
+
+        w = hom[:, 3:4]
+        w = np.where(np.abs(w) > 1e-12, w, 1.0)
+        pos = hom[:, :3] / w
+
+        rows = spline_rows(offsets, [item[0] for item in items])
+        positions[rows] = pos
+        derivatives[rows] = (dhom[:, :3] - dhom[:, 3:4] * pos) / w
+
+        # Blender aims the ends of open nurbs splines along the control polygon
+        for i, co, radius, tilt, res, spline in items:
+            if cyclic[i]: continue
+            derivatives[offsets[i]] = co[1, :3] - co[0, :3]
+            derivatives[offsets[i + 1] - 1] = co[-1, :3] - co[-2, :3]
+        radii[rows] = hom[:, 4] / w[:, 0]
+        tilts[rows] = hom[:, 5] / w[:, 0]
+
+    # Poly splines are sampled at their points
+    for i, co, radius, tilt in poly_items:
+        rows = slice(offsets[i], offsets[i + 1])
+        pos = co[:, :3].astype(np.float64)
+        positions[rows] = pos
+        radii[rows] = radius
+        tilts[rows] = tilt
+        derivatives[rows] = bisector_tangents(pos, cyclic[i])
+        point_samples[point_offsets[i]:point_offsets[i + 1]] = offsets[i] + np.arange(len(radius))
+
+    point_co = np.concatenate(point_co).astype(np.float64) if point_co else np.zeros((0, 3))
+    point_radii = np.concatenate(point_radii) if point_radii else np.zeros(0, dtype=np.float32)
+
+    return CurveSamples(positions, derivatives, radii, tilts, offsets, cyclic, point_samples, point_offsets,
+            point_co, point_radii)
+
+def normalize_rows(vecs):
+    lengths = np.linalg.norm(vecs, axis=-1)
+    return vecs / np.where(lengths > 1e-12, lengths, 1.0)[..., None], lengths
+
+def bisector_tangents(positions, cyclic=False):
+    """ Blender's bevel direction: bisector of the incoming and outgoing segment """
+    if len(positions) < 2:
+        return np.zeros_like(positions)
+    if cyclic:
+        seg = np.roll(positions, -1, axis=0) - positions
+        seg, _ = normalize_rows(seg)
+        tangents = seg + np.roll(seg, 1, axis=0)
+    else:
+        seg = positions[1:] - positions[:-1]
+        seg, _ = normalize_rows(seg)
+        tangents = np.empty_like(positions)
+        tangents[0] = seg[0]
+        tangents[-1] = seg[-1]
+        tangents[1:-1] = seg[1:] + seg[:-1]
+    return normalize_rows(tangents)[0]
+
+def rotate_minimal(vecs, from_dirs, to_dirs):
+    """ Rotate vecs by the smallest rotations taking from_dirs to to_dirs """
+    axis = np.cross(from_dirs, to_dirs)
+    c = np.einsum('ij,ij->i', from_dirs, to_dirs)
+    denom = 1.0 + c
+    fac = np.where(denom > 1e-8, np.einsum('ij,ij->i', axis, vecs) / np.where(denom > 1e-8, denom, 1.0), 0.0)
+    return vecs * c[:, None] + np.cross(axis, vecs) + axis * fac[:, None]
+
+def compute_frames(samples):
+    """ Minimum twist frames with tilt, returns (tangents, normals, binormals).
+    Bevel profile point (x, y) lands at position + radius * (x * normal + y * binormal) """
+    total = len(samples)
+    tangents = np.zeros((total, 3), dtype=np.float64)
+    normals = np.zeros((total, 3), dtype=np.float64)
+    binormals = np.zeros((total, 3), dtype=np.float64)
+
+    offsets = samples.offsets
+    counts = np.diff(offsets)
+    live = np.nonzero(counts > 0)[0]
+    if not len(live):
+        return tangents, normals, binormals
+
+    # Tangents follow Blender's bisector rule, degenerate ones fall back to the derivative.
+    # Open ends take the derivative, handle direction on bezier splines
+    for i in live:
+        rows = samples.spline_slice(i)
+        tan = bisector_tangents(samples.positions[rows], samples.cyclic[i])
+        der, length = normalize_rows(samples.derivatives[rows])
+        bad = np.linalg.norm(tan, axis=1) < 0.5
+        if not samples.cyclic[i]:
+            bad[[0, -1]] |= length[[0, -1]] > 1e-9
+        tan[bad] = der[bad]
+        tangents[rows] = tan
+
+    # Padded (splines, length) rows, short splines repeat their last sample
+    counts = counts[live]
+    length = counts.max()
+    rows = offsets[live][:, None] + np.minimum(np.arange(length)[None, :], counts[:, None] - 1)
+    tan = tangents[rows]
+
+    # Start with local Z projected on the normal plane, Y when tangent points along Z
+    t0 = tan[:, 0]
+    ref = np.zeros_like(t0)
+    along_z = np.abs(t0[:, 2]) > 0.999
+    ref[~along_z, 2] = 1.0
+    ref[along_z, 1] = 1.0
+    up = ref - t0 * np.einsum('ij,ij->i', ref, t0)[:, None]
+    up, _ = normalize_rows(up)
+
+    ups = np.empty_like(tan)
+    ups[:, 0] = up
+    for j in range(1, length):
+        up = rotate_minimal(up, tan[:, j - 1], tan[:, j])
+        up = up - tan[:, j] * np.einsum('ij,ij->i', up, tan[:, j])[:, None]
+        up, _ = normalize_rows(up)
+        ups[:, j] = up
+
+    # Cyclic splines spread the twist mismatch at the seam evenly along the spline
+    angles = samples.tilts[rows].copy()
+    cyc = samples.cyclic[live]
+    if cyc.any():
+        last = counts - 1
+        idx = np.arange(len(live))
+        closing = rotate_minimal(ups[idx, last], tan[idx, last], tan[:, 0])
+        mismatch = np.arctan2(
+                np.einsum('ij,ij->i', np.cross(closing, ups[:, 0]), tan[:, 0]),
+                np.einsum('ij,ij->i', closing, ups[:, 0]))
+        fac = np.arange(length)[None, :] / counts[:, None]
+        angles += np.where(cyc, mismatch, 0.0)[:, None] * fac
+
+    cos = np.cos(angles)[..., None]
+    sin = np.sin(angles)[..., None]
+    ups = ups * cos + np.cross(tan, ups) * sin
+
+    valid = np.arange(length)[None, :] < counts[:, None]
+    flat_rows = rows[valid]
+    binormals[flat_rows] = ups[valid]
+    normals[flat_rows] = np.cross(tan[valid], ups[valid])
+
+    return tangents, normals, binormals
+
+class CurveEvaluation:
+    """ Cached evaluation of curve data, frames are computed on first use.
+    Arrays are shared between consumers, so they are read only """
+
+    def __init__(self, signature, samples):
+        self.signature = signature
+        self.samples = samples
+        self._frames = None
+        self.cache = None
+        for a in vars(samples).values():
+            if isinstance(a, np.ndarray): a.flags.writeable = False
+
+    @property
+    def frames(self):
+        if self._frames is None:
+            self._frames = compute_frames(self.samples)
+            for a in self._frames: a.flags.writeable = False
+            if self.cache: self.cache.grow(sum(a.nbytes for a in self._frames))
+        return self._frames
+
+    @property
+    def nbytes(self):
+        nbytes = self.samples.nbytes
+        if self._frames is not None:
+            nbytes += sum(a.nbytes for a in self._frames)
+        return nbytes
+
+def curve_signature(curve, resolution=None):
+    """ Cheap structural signature of curve data, point edits are caught by depsgraph updates """
+    return (resolution, curve.resolution_u, tuple((
+        s.type, len(get_spline_points(s)), s.use_cyclic_u, s.resolution_u, s.order_u,
+        s.use_endpoint_u, s.use_bezier_u, s.radius_interpolation, s.tilt_interpolation)
+        for s in curve.splines))
+
+class CurveCache:
+    """ Evaluated curves keyed by (curve pointer, resolution), least recently used first.
+    Total size and keys of every pointer are kept as entries come and go,
+    so adding and invalidating never walk the whole cache """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.pointer_keys = dict()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry: self.entries.move_to_end(key)
+        return entry
+
+    def add(self, key, entry):
+        self.remove(key)
+        self.entries[key] = entry
+        self.pointer_keys.setdefault(key[0], set()).add(key)
+        entry.cache = self
+        self.grow(entry.nbytes)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if not entry: return
+        keys = self.pointer_keys[key[0]]
+        keys.discard(key)
+        if not keys: del self.pointer_keys[key[0]]
+        entry.cache = None
+        self.nbytes -= entry.nbytes
+
+    def remove_pointer(self, pointer):
+        for key in list(self.pointer_keys.get(pointer, ())):
+            self.remove(key)
+
+    def clear(self):
+        for entry in self.entries.values():
+            entry.cache = None
+        self.entries.clear()
+        self.pointer_keys.clear()
+        self.nbytes = 0
+
+    def grow(self, nbytes):
+        """ Count new bytes of an entry, then drop least recently used ones until the cache fits its cap """
+        self.nbytes += nbytes
+        while self.nbytes > CURVE_CACHE_MAX_BYTES and len(self.entries) > 1:
+            self.remove(next(iter(self.entries)))
+
+_curve_cache = CurveCache()
+
+def invalidate_curve_evaluation(curve=None):
+    """ Forget cached evaluation of curve data, all of them if curve is None """
+    if curve is None:
+        _curve_cache.clear()
+    else: _curve_cache.remove_pointer(curve.as_pointer())
+
+def get_curve_evaluation(curve, resolution=None):
+    """ Evaluation of curve data shared by placement, frames and conversion """
+    signature = curve_signature(curve, resolution)
+
+    # Blender 2.79 has no depsgraph updates to invalidate with
+    if not HAS_DEPSGRAPH:
+        return CurveEvaluation(signature, evaluate_curve(curve, resolution))
+
+    key = (curve.as_pointer(), resolution)
+    entry = _curve_cache.get(key)
+    if entry and entry.signature == signature:
+        return entry
+
+    entry = CurveEvaluation(signature, evaluate_curve(curve, resolution))
+    _curve_cache.add(key, entry)
+    return entry
+
+@persistent
+def curve_cache_depsgraph_update(scene, depsgraph=None):
+    if depsgraph is None or not _curve_cache:
+        return
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, bpy.types.Object):
+            data = data.data if data.type == 'CURVE' else None
+        if isinstance(data, bpy.types.Curve):
+            invalidate_curve_evaluation(data)
+
+@persistent
+def curve_cache_reset(*args):
+    # Pointers can be reused after undo or load
+    invalidate_curve_evaluation()
+
+def get_profile_coords(curve):
+    """ Profile parts of curve data as list of (coords, closed), coords is (n, 2) """
+    samples = get_curve_evaluation(curve).samples
+
+    profiles = []
+    for i in range(samples.spline_count):
+        coords = samples.positions[samples.spline_slice(i), :2]
+        if len(coords) > 1:
+            profiles.append((coords, bool(samples.cyclic[i])))
+
+    return profiles
+
+def get_bevel_profiles(curve):
+    """ Bevel profile parts of curve as list of (coords, closed), coords is (n, 2) already
+    scaled by bevel object scale like Blender does """
+    bevel_obj = curve.bevel_object
+    if not bevel_obj:
+        return []
+
+    scale = np.array((bevel_obj.scale[0], bevel_obj.scale[1]))
+    return [(coords * scale, closed) for coords, closed in get_profile_coords(bevel_obj.data)]
+
+def decimate_profile(coords, closed, ratio=1.0):
+    """ Keep about ratio of profile points, evenly spread by index """
+    count = len(coords)
+    keep = min(max(int(math.ceil(count * ratio)), 3 if closed else 2), count)
+    if keep == count:
+        return coords
+    if closed:
+        idx = np.floor(np.arange(keep) * count / keep).astype(np.int64)
+    else: idx = np.round(np.linspace(0, count - 1, keep)).astype(np.int64)
+    return coords[idx]
+
+def lod_sample_rows(samples, ratio=1.0):
+    """ Sample rows keeping about ratio of samples between control points.
+    Returns (rows, offsets), control point samples are always kept """
+    if ratio >= 1.0:
+        return np.arange(len(samples)), samples.offsets
+
+    rows = []
+    counts = np.zeros(samples.spline_count, dtype=np.int64)
+    for i in range(samples.spline_count):
+        start, end = samples.offsets[i], samples.offsets[i + 1]
+        if start == end: continue
+        anchors = samples.point_samples[samples.point_offsets[i]:samples.point_offsets[i + 1]]
+        bounds = np.unique(np.append(anchors, end))
+        bounds = bounds[(bounds >= start) & (bounds <= end)]
+        if bounds[0] != start: bounds = np.insert(bounds, 0, start)
+        lengths = np.diff(bounds)
+        keeps = np.maximum(np.ceil(lengths * ratio).astype(np.int64), 1)
+        # Position of each kept sample inside its interval
+        first = np.repeat(np.cumsum(keeps) - keeps, keeps)
+        local = np.arange(keeps.sum()) - first
+        picked = np.repeat(bounds[:-1], keeps) + (local * np.repeat(lengths, keeps)) // np.repeat(keeps, keeps)
+        rows.append(picked)
+        counts[i] = len(picked)
+
+    offsets = np.zeros(samples.spline_count + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    return rows, offsets
+
+def sweep_profiles(positions, radii, normals, binormals, offsets, cyclic, profiles, fill_caps=True, spline_materials=None):
+    """ Sweep bevel profiles along sampled splines.
+    Returns (co, loop_starts, loop_totals, loop_verts, face_materials) mesh buffers.
+    Vertices are laid out ring by ring, spline by spline, one block per profile part,
+    caps reuse ring vertices so the result needs no welding """
+    counts = np.diff(offsets)
+    spline_ids = np.repeat(np.arange(len(counts)), counts)
+    total = len(positions)
+
+    # Ring pairs to bridge, the last ring of cyclic splines goes back to the first
+    ring = np.arange(total)
+    is_last = np.zeros(total, dtype=bool)
+    is_last[offsets[1:][counts > 0] - 1] = True
+    pair_a = ring[~is_last]
+    pair_b = pair_a + 1
+    wrap = np.nonzero(cyclic & (counts > 2))[0]
+    pair_a = np.concatenate((pair_a, offsets[wrap + 1] - 1))
+    pair_b = np.concatenate((pair_b, offsets[wrap]))
+    order = np.argsort(pair_a, kind='stable')
+    pair_a = pair_a[order]
+    pair_b = pair_b[order]
+
+    caps = np.nonzero(~cyclic & (counts > 1))[0] if fill_caps else np.zeros(0, dtype=np.int64)
+
+    if spline_materials is None:
+        spline_materials = np.zeros(len(counts), dtype=np.int64)
+
+    co_parts = []
+    verts_parts = []
+    totals_parts = []
+    mats_parts = []
+    vert_offset = 0
+
+    for coords, closed in profiles:
+        m = len(coords)
+
+        # Ring vertices
+        off = coords[:, 0][None, :, None] * normals[:, None, :] + coords[:, 1][None, :, None] * binormals[:, None, :]
+        co_parts.append((positions[:, None, :] + radii[:, None, None] * off).reshape(-1, 3))
+
+        # Keep faces pointing outward whatever winding the profile uses.
+        # Normal, binormal and tangent form a left-handed frame, like Blender's
+        area = np.sum(coords[:, 0] * np.roll(coords[:, 1], -1) - np.roll(coords[:, 0], -1) * coords[:, 1])
+        ccw = area < 0.0
+
+        ma = np.arange(m if closed else m - 1)
+        mb = (ma + 1) % m
+        if not ccw:
+            ma, mb = mb, ma
+        quads = np.stack((
+            pair_a[:, None] * m + ma[None, :],
+            pair_a[:, None] * m + mb[None, :],
+            pair_b[:, None] * m + mb[None, :],
+            pair_b[:, None] * m + ma[None, :]), axis=-1) + vert_offset
+        verts_parts.append(quads.ravel())
+        totals_parts.append(np.full(quads.shape[0] * quads.shape[1], 4, dtype=np.int64))
+        mats_parts.append(np.repeat(spline_materials[spline_ids[pair_a]], quads.shape[1]))
+
+        if closed and len(caps):
+            profile_order = np.arange(m) if ccw else np.arange(m)[::-1]
+            start = offsets[caps][:, None] * m + profile_order[::-1][None, :]
+            end = (offsets[caps + 1] - 1)[:, None] * m + profile_order[None, :]
+            cap_verts = np.stack((start, end), axis=1) + vert_offset
+            verts_parts.append(cap_verts.ravel())
+            totals_parts.append(np.full(len(caps) * 2, m, dtype=np.int64))
+            mats_parts.append(np.repeat(spline_materials[caps], 2))
+
+        vert_offset += total * m
+
+    if not co_parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros((0, 3)), empty, empty, empty, empty
+
+    co = np.concatenate(co_parts)
+    loop_verts = np.concatenate(verts_parts)
+    loop_totals = np.concatenate(totals_parts)
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int64)
+    np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+
+    return co, loop_starts, loop_totals, loop_verts, np.concatenate(mats_parts)
+
+def get_thread_count(scene):
+    threads = scene.bevel_curve_tools.threads
+    return threads if threads > 0 else (os.cpu_count() or 1)
+
+def map_batches(func, items, threads=1):
+    """ Run func over items on a thread pool, results keep the order of items.
+    Workers must not touch Blender data, numpy releases the GIL on big arrays """
+    if threads <= 1 or len(items) < 2:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(threads, len(items))) as pool:
+        return list(pool.map(func, items))
+
+def concatenate_mesh_buffers(parts):
+    """ Join (co, loop_starts, loop_totals, loop_verts, face_materials) buffers in order """
+    if len(parts) == 1:
+        return parts[0]
+    vert_offsets = np.cumsum([0] + [len(p[0]) for p in parts])
+    loop_offsets = np.cumsum([0] + [len(p[3]) for p in parts])
+    co = np.concatenate([p[0] for p in parts])
+    loop_starts = np.concatenate([p[1] + loop_offsets[i] for i, p in enumerate(parts)])
+    loop_totals = np.concatenate([p[2] for p in parts])
+    loop_verts = np.concatenate([p[3] + vert_offsets[i] for i, p in enumerate(parts)])
+    face_materials = np.concatenate([p[4] for p in parts])
+    return co, loop_starts, loop_totals, loop_verts, face_materials
+
+def spline_batches(offsets, batch_rows=SWEEP_BATCH_ROWS):
+    """ Contiguous (first, last) spline ranges holding about batch_rows samples each """
+    batches = list()
+    first = 0
+    for i in range(1, len(offsets)):
+        if offsets[i] - offsets[first] >= batch_rows or i == len(offsets) - 1:
+            batches.append((first, i))
+            first = i
+    return batches
+
+def sweep_profiles_batched(positions, radii, normals, binormals, offsets, cyclic, profiles,
+        fill_caps=True, spline_materials=None, threads=1):
+    """ sweep_profiles over spline batches on a thread pool.
+    Output is the same whatever the thread count """
+    if spline_materials is None:
+        spline_materials = np.zeros(len(offsets) - 1, dtype=np.int64)
+
+    def sweep(batch):
+        first, last = batch
+        start, end = offsets[first], offsets[last]
+        return sweep_profiles(
+                positions[start:end], radii[start:end], normals[start:end], binormals[start:end],
+                offsets[first:last + 1] - start, cyclic[first:last], profiles,
+                fill_caps, spline_materials[first:last])
+
+    batches = spline_batches(offsets)
+    if not batches:
+        return sweep_profiles(positions, radii, normals, binormals, offsets, cyclic, profiles,
+                fill_caps, spline_materials)
+    return concatenate_mesh_buffers(map_batches(sweep, batches, threads))
+
+def new_mesh_from_buffers(name, co, loop_starts, loop_totals, loop_verts, face_materials=None, smooth=True):
+    mesh = bpy.data.meshes.new(name)
+    fill_mesh_from_buffers(mesh, co, loop_starts, loop_totals, loop_verts, face_materials, smooth)
+    return mesh
+
+def fill_mesh_from_buffers(mesh, co, loop_starts, loop_totals, loop_verts, face_materials=None, smooth=True):
+    """ Write buffers into a mesh without geometry """
+    mesh.vertices.add(len(co))
+    mesh.loops.add(len(loop_verts))
+    mesh.polygons.add(len(loop_starts))
+
+    mesh.vertices.foreach_set('co', np.ascontiguousarray(co, dtype=np.float32).ravel())
+    mesh.loops.foreach_set('vertex_index', np.ascontiguousarray(loop_verts, dtype=np.int32))
+    mesh.polygons.foreach_set('loop_start', np.ascontiguousarray(loop_starts, dtype=np.int32))
+    set_polygon_loop_totals(mesh, loop_totals)
+    if face_materials is not None:
+        mesh.polygons.foreach_set('material_index', np.ascontiguousarray(face_materials, dtype=np.int32))
+    if smooth:
+        mesh.polygons.foreach_set('use_smooth', np.ones(len(loop_starts), dtype=bool))
+
+    mesh.update(calc_edges=True)
+
+def get_spline_materials(curve):
+    materials = np.zeros(len(curve.splines), dtype=np.int32)
+    curve.splines.foreach_get('material_index', materials)
+    return materials
+
+def build_lod_buffers(curve_obj, lod_count=4, ring_reduction=0.5, profile_reduction=0.75, threads=1):
+    """ Mesh buffers of every level of detail of a beveled curve.
+    The curve is evaluated only once, coarser levels pick from the same samples and frames """
     curve = curve_obj.data
-    points = get_spline_points(curve.splines[spline_index])
-    return mul(curve_mat, points[index].co.xyz)
+    evaluation = get_curve_evaluation(curve)
+    samples = evaluation.samples
+    tangents, normals, binormals = evaluation.frames
+    profiles = get_bevel_profiles(curve)
+    materials = get_spline_materials(curve)
+
+    lods = []
+    for level in range(lod_count):
+        rows, offsets = lod_sample_rows(samples, ring_reduction ** level)
+        level_profiles = [(decimate_profile(c, closed, profile_reduction ** level), closed) for c, closed in profiles]
+        lods.append(sweep_profiles_batched(
+            samples.positions[rows], samples.radii[rows], normals[rows], binormals[rows],
+            offsets, samples.cyclic, level_profiles, curve.use_fill_caps, materials, threads))
+
+    return lods
+
+def get_lod_error(curve_obj):
+    """ Reason the LOD sweep can't reproduce the beveled curve, None if it can.
+    The sweep only knows bevel object, radius, tilt and minimum twist """
+    curve = curve_obj.data
+    name = "Curve " + curve_obj.name
+    if curve_obj.modifiers:
+        return name + " has modifiers"
+    if curve.shape_keys:
+        return name + " has shape keys"
+    if curve.taper_object:
+        return name + " has a taper object"
+    if curve.bevel_factor_start != 0.0 or curve.bevel_factor_end != 1.0:
+        return name + " has bevel start or end factor"
+    if curve.offset != CURVE_OFFSET_DEFAULT or curve.extrude != 0.0:
+        return name + " has offset or extrude"
+    if not frames_match_blender(curve):
+        return name + " isn't a 3D curve with minimum twist"
+    return None
+
+def get_lod_collection(scene, level):
+    """ Collection of LOD level in scene, made by this add-on, so user collections named
+    like it are never filled """
+    for col in scene.collection.children:
+        if col.library is None and col.get(LOD_COLLECTION_KEY) == level:
+            return col
+    # Blender makes the name unique
+    col = bpy.data.collections.new('LOD' + str(level))
+    col[LOD_COLLECTION_KEY] = level
+    scene.collection.children.link(col)
+    return col
+
+def convert_curve_to_lod_meshes(context, lod_count=4, ring_reduction=0.5, profile_reduction=0.75):
+    """ Returns (new objects, reasons of skipped curves) """
+
+    scn = context.scene
+    objs = get_scene_objects()
+
+    selected_objs = [o for o in objs if 
+            get_object_select(o) and 
+            o.type == 'CURVE' and 
+            o.data.bevel_object]
+
+    # Curves using features the sweep doesn't model stay as they are
+    skipped = list()
+    for o in selected_objs[:]:
+        error = get_lod_error(o)
+        if error:
+            skipped.append(error)
+            selected_objs.remove(o)
+    if not selected_objs:
+        return [], skipped
+
+    # Conversion always uses full resolution
+    restore_proxy(selected_objs)
+
+    # Listing bevel objects still used by curves that aren't converted
+    converted = set(selected_objs)
+    not_sel_bev_objs = [o.data.bevel_object for o in objs if 
+            o not in converted and 
+            o.type == 'CURVE' and 
+            o.data.bevel_object]
+
+    bev_objs_to_del = list()
+    for o in selected_objs:
+        bev_ob = o.data.bevel_object
+        if bev_ob not in not_sel_bev_objs and bev_ob not in bev_objs_to_del:
+            bev_objs_to_del.append(bev_ob)
+
+    active_name = context.active_object.name if context.active_object else ''
+    bpy.ops.object.select_all(action='DESELECT')
+
+    threads = get_thread_count(scn)
+    new_objs = list()
+    for o in selected_objs:
+        for level, buffers in enumerate(build_lod_buffers(o, lod_count, ring_reduction, profile_reduction, threads)):
+            name = o.name + '_LOD' + str(level)
+            mesh = new_mesh_from_buffers(name, *buffers)
+            for mat in o.data.materials:
+                mesh.materials.append(mat)
+
+            lod_obj = bpy.data.objects.new(name, mesh)
+            lod_obj.matrix_world = o.matrix_world.copy()
+
+            link_lod_object(scn, lod_obj, level)
+
+            set_object_select(lod_obj, True)
+            new_objs.append(lod_obj)
+            if level == 0 and o.name == active_name:
+                set_active_object(lod_obj)
+
+    # Remove converted curves and their unused bevel objects
+    for o in selected_objs + bev_objs_to_del:
+        bpy.data.objects.remove(o, do_unlink=True)
+
+    # Shared bevel objects of remaining curves go back to proxy
+    refresh_proxy(scn)
+    mark_panel_state_dirty()
+
+    return new_objs, skipped
+
+def get_beveled_curves(scene):
+    return [o for o in scene.objects if o.type == 'CURVE' and o.data.bevel_object]
+
+def make_proxy_profile(curve, max_points):
+    """ Simplified poly copy of a bevel curve """
+    proxy = bpy.data.curves.new(curve.name + '_proxy', 'CURVE')
+    proxy.dimensions = curve.dimensions
+
+    add_profile_splines(proxy, [(decimate_profile(coords, closed, max_points / len(coords)), closed)
+        for coords, closed in get_profile_coords(curve)])
+
+    return proxy
+
+def get_proxy_full_value(id_data, attr, key):
+    """ Value of attr without proxy. A value changed since the proxy was applied is the full one """
+    value = getattr(id_data, attr)
+    if key in id_data and value == id_data[key][1]:
+        return id_data[key][0]
+    return value
+
+def set_proxy_value(id_data, attr, key, full, value):
+    """ Set attr to proxy value, full value is only kept when they differ """
+    # Avoid tagging data that is already there
+    if getattr(id_data, attr) != value:
+        setattr(id_data, attr, value)
+    if value != full:
+        id_data[key] = [full, value]
+    elif key in id_data:
+        del id_data[key]
+
+def restore_proxy_value(id_data, attr, key):
+    """ Put back full value of attr, unless it was changed since the proxy was applied """
+    if key not in id_data:
+        return
+    full, value = id_data[key]
+    if getattr(id_data, attr) == value:
+        setattr(id_data, attr, full)
+    del id_data[key]
+
+def apply_proxy(curve_objs, resolution=2, profile_points=4):
+    """ Swap beveled curves to reduced viewport resolution and simplified bevel profiles.
+    Full resolution stays as render resolution and is kept on custom properties """
+    for o in curve_objs:
+        curve = o.data
+        full = get_proxy_full_value(curve, 'resolution_u', PROXY_RESOLUTION_KEY)
+        set_proxy_value(curve, 'resolution_u', PROXY_RESOLUTION_KEY, full, min(resolution, full))
+
+        # Render resolution 0 follows the viewport one, it has to hold the full one instead
+        render = get_proxy_full_value(curve, 'render_resolution_u', PROXY_RENDER_RESOLUTION_KEY)
+        set_proxy_value(curve, 'render_resolution_u', PROXY_RENDER_RESOLUTION_KEY, render, render or full)
+
+        bevel_obj = curve.bevel_object
+        if PROXY_FULL_DATA_KEY in bevel_obj:
+            # Profile replaced while in proxy mode, it's the new full profile
+            if bevel_obj.data != bevel_obj[PROXY_DATA_KEY]:
+                restore_proxy_profile(bevel_obj)
+            elif bevel_obj[PROXY_POINTS_KEY] == profile_points:
+                continue
+            else:
+                # Profile point count changed, rebuild the proxy
+                old_proxy = bevel_obj.data
+                bevel_obj.data = bevel_obj[PROXY_DATA_KEY] = make_proxy_profile(
+                        bevel_obj[PROXY_FULL_DATA_KEY], profile_points)
+                if old_proxy.users == 0:
+                    bpy.data.curves.remove(old_proxy)
+                bevel_obj[PROXY_POINTS_KEY] = profile_points
+                continue
+
+        full = bevel_obj.data
+        # Full profile has no user while swapped
+        full.use_fake_user = True
+        bevel_obj[PROXY_FULL_DATA_KEY] = full
+        bevel_obj.data = bevel_obj[PROXY_DATA_KEY] = make_proxy_profile(full, profile_points)
+        bevel_obj[PROXY_POINTS_KEY] = profile_points
+
+def restore_proxy_profile(bevel_obj):
+    """ Bring back full profile of bevel object, unless its data was replaced since """
+    proxy = bevel_obj[PROXY_DATA_KEY]
+    full = bevel_obj[PROXY_FULL_DATA_KEY]
+    if bevel_obj.data == proxy:
+        bevel_obj.data = full
+    full.use_fake_user = False
+    del bevel_obj[PROXY_FULL_DATA_KEY]
+    del bevel_obj[PROXY_DATA_KEY]
+    del bevel_obj[PROXY_POINTS_KEY]
+    if proxy.users == 0:
+        bpy.data.curves.remove(proxy)
+
+def restore_proxy(curve_objs):
+    """ Bring back full resolution and bevel profiles of beveled curves,
+    values changed while proxy mode was on are kept """
+    for o in curve_objs:
+        curve = o.data
+        restore_proxy_value(curve, 'resolution_u', PROXY_RESOLUTION_KEY)
+        restore_proxy_value(curve, 'render_resolution_u', PROXY_RENDER_RESOLUTION_KEY)
+
+        bevel_obj = curve.bevel_object
+        if bevel_obj and PROXY_FULL_DATA_KEY in bevel_obj:
+            restore_proxy_profile(bevel_obj)
+
+def refresh_proxy(scene, curve_objs=None):
+    """ Apply proxy mode again on beveled curves if it's enabled, all curves of the scene by default """
+    settings = scene.bevel_curve_tools
+    if settings.use_proxy:
+        if curve_objs is None:
+            curve_objs = get_beveled_curves(scene)
+        apply_proxy(curve_objs, settings.proxy_resolution, settings.proxy_profile_points)
+
+def swap_proxy_profiles(scene, full=True):
+    """ Temporarily use full bevel profiles, used around rendering.
+    Only bevel objects still holding the swapped out data are swapped back """
+    for o in scene.objects:
+        if PROXY_FULL_DATA_KEY not in o:
+            continue
+        if full and o.data == o[PROXY_DATA_KEY]:
+            o.data = o[PROXY_FULL_DATA_KEY]
+        elif not full and o.data == o[PROXY_FULL_DATA_KEY]:
+            o.data = o[PROXY_DATA_KEY]
+
+@persistent
+def proxy_render_pre(scene, *args):
+    if scene.bevel_curve_tools.use_proxy:
+        swap_proxy_profiles(scene, True)
+
+@persistent
+def proxy_render_post(scene, *args):
+    swap_proxy_profiles(scene, False)
+
+def update_proxy_mode(self, context):
+    scene = context.scene
+    if self.use_proxy:
+        apply_proxy(get_beveled_curves(scene), self.proxy_resolution, self.proxy_profile_points)
+    else: restore_proxy(get_beveled_curves(scene))
 
 def bool_union(context):
     obj = context.active_object
     sel_objs = [o for o in context.selected_objects if o != obj]
+
+    # Stack all boolean modifiers and bake them with one evaluation
+    if HAS_DEPSGRAPH and not obj.modifiers:
+        for o in sel_objs:
+            md = obj.modifiers.new('booleanunion', 'BOOLEAN')
+            md.operation = 'UNION'
+            md.object = o
+
+        depsgraph = context.evaluated_depsgraph_get()
+        mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+        obj.modifiers.clear()
+
+        old_mesh = obj.data
+        obj.data = mesh
+        if old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+        mesh.name = obj.name
+
+        for o in sel_objs:
+            bpy.data.objects.remove(o, do_unlink=True)
+
+        set_active_object(obj)
+        return
+
     for o in sel_objs:
 
         set_active_object(obj)
@@ -118,13 +1502,723 @@ def bool_union(context):
         bpy.ops.object.modifier_apply(modifier="booleanunion")
 
         # Delete current object
-        bpy.ops.object.select_all(action='DESELECT')
-        set_active_object(o)
-        set_object_select(o, True)
-        bpy.ops.object.delete()
+        bpy.data.objects.remove(o, do_unlink=True)
 
     set_active_object(obj)
 
+def get_mesh_buffers(mesh):
+    """ Read (co, loop_starts, loop_totals, loop_verts, face_materials, uvs) of a mesh,
+    uvs is None if mesh has no uv map """
+    num_verts = len(mesh.vertices)
+    num_loops = len(mesh.loops)
+    num_faces = len(mesh.polygons)
+
+    co = np.empty(num_verts * 3, dtype=np.float32)
+    loop_verts = np.empty(num_loops, dtype=np.int32)
+    loop_starts = np.empty(num_faces, dtype=np.int32)
+    loop_totals = np.empty(num_faces, dtype=np.int32)
+    face_materials = np.empty(num_faces, dtype=np.int32)
+
+    mesh.vertices.foreach_get('co', co)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    mesh.polygons.foreach_get('material_index', face_materials)
+
+    uvs = None
+    if mesh.uv_layers.active:
+        uvs = np.empty(num_loops * 2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get('uv', uvs)
+        uvs = uvs.reshape(-1, 2)
+
+    return co.reshape(-1, 3), loop_starts, loop_totals, loop_verts, face_materials, uvs
+
+def get_evaluated_mesh_buffers(obj, depsgraph):
+    """ Mesh buffers of evaluated object in object space, no object is created """
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    buffers = get_mesh_buffers(mesh)
+    obj_eval.to_mesh_clear()
+    return buffers
+
+def remove_degenerate_faces(loop_starts, loop_totals, loop_verts):
+    """ Drop repeated consecutive loops and faces left with less than 3 vertices.
+    Returns (loop_starts, loop_totals, loop_verts, face_mask, loop_mask) """
+    num_loops = len(loop_verts)
+    if not num_loops:
+        face_mask = np.ones(len(loop_starts), dtype=bool)
+        return loop_starts, loop_totals, loop_verts, face_mask, np.ones(0, dtype=bool)
+
+    nxt = np.arange(1, num_loops + 1)
+    nxt[loop_starts + loop_totals - 1] = loop_starts
+    loop_mask = loop_verts != loop_verts[nxt]
+
+    totals = np.add.reduceat(loop_mask.astype(np.int64), loop_starts)
+    face_mask = totals >= 3
+    loop_mask &= np.repeat(face_mask, loop_totals)
+
+    if loop_mask.all():
+        return loop_starts, loop_totals, loop_verts, face_mask, loop_mask
+
+    loop_totals = totals[face_mask]
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int64)
+    np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+    return loop_starts, loop_totals, loop_verts[loop_mask], face_mask, loop_mask
+
+def get_seam_vertices(loop_starts, loop_totals, loop_verts, num_verts):
+    """ Vertices where seams of swept tubes can be: cap vertices, on faces other than quads,
+    and end ring vertices, used by less faces than the 4 quads around a tube vertex.
+    Face uses are counted with bincount, no edge has to be sorted """
+    if not len(loop_verts):
+        return np.zeros(0, dtype=np.int64)
+
+    seams = np.bincount(loop_verts, minlength=num_verts) < 4
+    seams[loop_verts[np.repeat(loop_totals != 4, loop_totals)]] = True
+    return np.flatnonzero(seams)
+
+def find_close_pairs(co, dist):
+    """ Pairs (i, j), i < j, of points within dist, sorted by i then j.
+    Points are swept along their widest axis, each one only meets the next ones closer than dist on it """
+    if len(co) < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    axis = int(np.argmax(np.ptp(co, axis=0)))
+    order = np.argsort(co[:, axis], kind='stable')
+    sorted_co = co[order]
+
+    pairs = list()
+    for k in range(1, len(co)):
+        near = np.flatnonzero(sorted_co[k:, axis] - sorted_co[:-k, axis] <= dist)
+        if not len(near):
+            break
+        near = near[np.linalg.norm(sorted_co[near + k] - sorted_co[near], axis=1) <= dist]
+        pairs.append(np.stack((order[near], order[near + k]), axis=1))
+
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+def weld_seam_vertices(co, loop_starts, loop_totals, loop_verts, dist=0.0001):
+    """ Merge duplicated vertices of swept tubes. Only seam vertices (cap and end rings) are
+    checked: exact duplicates are mapped by index, then the distinct positions left within dist
+    are merged into the lowest one that isn't merged itself.
+    Returns (co, loop_starts, loop_totals, loop_verts, face_mask, loop_mask) """
+    num_verts = len(co)
+    face_mask = np.ones(len(loop_starts), dtype=bool)
+    loop_mask = np.ones(len(loop_verts), dtype=bool)
+
+    seams = get_seam_vertices(loop_starts, loop_totals, loop_verts, num_verts)
+    if len(seams) < 2:
+        return co, loop_starts, loop_totals, loop_verts, face_mask, loop_mask
+
+    target = np.arange(num_verts)
+
+    # Exact duplicates, seams are sorted so the first one of a group has the lowest index
+    _, first, inverse = np.unique(co[seams], axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    target[seams] = seams[first[inverse]]
+
+    # Distinct seam positions can still be close to each other, like rings shrunk near tips
+    reps = seams[first]
+    if dist > 0.0:
+        pairs = find_close_pairs(co[reps].astype(np.float64), dist)
+        if len(pairs):
+            rep_target = np.arange(len(reps))
+            for i, j in pairs.tolist():
+                if rep_target[i] == i and rep_target[j] == j:
+                    rep_target[j] = i
+            target[seams] = reps[rep_target[inverse]]
+
+    welded = target != np.arange(num_verts)
+    if not welded.any():
+        return co, loop_starts, loop_totals, loop_verts, face_mask, loop_mask
+
+    # Compact vertex indices, welded vertices are gone
+    new_index = np.cumsum(~welded) - 1
+    co = co[~welded]
+    loop_verts = new_index[target[loop_verts]]
+
+    loop_starts, loop_totals, loop_verts, face_mask, loop_mask = remove_degenerate_faces(
+            loop_starts, loop_totals, loop_verts)
+    return co, loop_starts, loop_totals, loop_verts, face_mask, loop_mask
+
+def weld_mesh_object(obj):
+    """ Weld seams of a mesh object by swapping in a rebuilt mesh, no edit mode needed """
+    mesh = obj.data
+    co, ls, lt, lv, mats, uvs = get_mesh_buffers(mesh)
+    new_co, ls, lt, lv, face_mask, loop_mask = weld_seam_vertices(co, ls, lt, lv)
+    if len(new_co) == len(co):
+        return
+
+    smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get('use_smooth', smooth)
+
+    new_mesh = new_mesh_from_buffers(mesh.name, new_co, ls, lt, lv, mats[face_mask], smooth=False)
+    new_mesh.polygons.foreach_set('use_smooth', smooth[face_mask])
+    for mat in mesh.materials:
+        new_mesh.materials.append(mat)
+
+    # Every uv map by name, the active one stays active
+    uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+    for layer in mesh.uv_layers:
+        layer.data.foreach_get('uv', uvs)
+        new_layer = new_mesh.uv_layers.new(name=layer.name)
+        new_layer.data.foreach_set('uv', uvs.reshape(-1, 2)[loop_mask].ravel())
+        if layer == mesh.uv_layers.active:
+            new_mesh.uv_layers.active = new_layer
+
+    name = mesh.name
+    obj.data = new_mesh
+    if mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+    new_mesh.name = name
+
+class MeshCache:
+    """ Baked mesh buffers of converted curves, keyed by curve content hash.
+    Arrays are appended to a blob file and read back through a memory map,
+    the json index holds where every array is """
+
+    def __init__(self, blob_path):
+        self.blob_path = blob_path
+        self.index_path = blob_path + '.json'
+        self.entries = dict()
+        self._map = None
+        self._dirty = False
+
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get('version') == MESH_CACHE_VERSION and os.path.isfile(blob_path):
+                self.entries = index['entries']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get_map(self):
+        size = os.path.getsize(self.blob_path) if os.path.isfile(self.blob_path) else 0
+        if self._map is None or len(self._map) != size:
+            self._map = np.memmap(self.blob_path, dtype=np.uint8, mode='r') if size else np.zeros(0, dtype=np.uint8)
+        return self._map
+
+    def get(self, key):
+        """ Read only (co, loop_starts, loop_totals, loop_verts, face_materials, uvs) views
+        on the mapped blob, None if key is not cached """
+        buffers = self.read(key)
+        if buffers is not None:
+            self.entries[key]['used'] = time.time()
+            self._dirty = True
+        return buffers
+
+    def read(self, key):
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+
+        data = self.get_map()
+        buffers = list()
+        for name, dtype in MESH_CACHE_ARRAYS:
+            info = entry['arrays'].get(name)
+            if info is None:
+                buffers.append(None)
+                continue
+            offset, shape = info
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if offset + nbytes > len(data):
+                return None
+            buffers.append(data[offset:offset + nbytes].view(dtype).reshape(shape))
+
+        return tuple(buffers)
+
+    def write_arrays(self, f, buffers):
+        """ Append buffers to open blob file f, returns their {name : [offset, shape]} """
+        arrays = dict()
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        for (name, dtype), arr in zip(MESH_CACHE_ARRAYS, buffers):
+            if arr is None: continue
+            arr = np.ascontiguousarray(arr, dtype=dtype)
+            # Keep arrays aligned
+            pad = -offset % 16
+            f.write(bytes(pad))
+            offset += pad
+            f.write(arr.tobytes())
+            arrays[name] = [offset, list(arr.shape)]
+            offset += arr.nbytes
+        return arrays
+
+    def put(self, key, buffers):
+        # Release the map before the blob grows
+        self.close()
+
+        with open(self.blob_path, 'ab') as f:
+            arrays = self.write_arrays(f, buffers)
+
+        self.entries[key] = {'arrays' : arrays, 'geometry' : geometry_hash(*buffers), 'used' : time.time()}
+        self._dirty = True
+
+    def entry_bytes(self, key):
+        """ Blob bytes of an entry, alignment included """
+        arrays = self.entries[key]['arrays']
+        return sum(int(np.prod(arrays[name][1])) * np.dtype(dtype).itemsize + 16
+                for name, dtype in MESH_CACHE_ARRAYS if name in arrays)
+
+    def compact(self, keep=(), max_bytes=MESH_CACHE_MAX_BYTES):
+        """ Rewrite the blob with entries in keep plus the most recently used others fitting
+        in max_bytes. Nothing is written if no entry goes and the blob has no dead space """
+        if not os.path.isfile(self.blob_path):
+            return
+
+        order = sorted(self.entries, key=lambda k: (k in keep, self.entries[k].get('used', 0.0)), reverse=True)
+        live = list()
+        total = 0
+        for key in order:
+            size = self.entry_bytes(key)
+            if key not in keep and total + size > max_bytes:
+                continue
+            live.append(key)
+            total += size
+
+        if len(live) == len(self.entries) and os.path.getsize(self.blob_path) <= total:
+            return
+
+        entries = dict()
+        tmp_path = self.blob_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for key in live:
+                buffers = self.read(key)
+                if buffers is None: continue
+                entries[key] = dict(self.entries[key], arrays=self.write_arrays(f, buffers))
+            buffers = None
+
+        self.close()
+        os.replace(tmp_path, self.blob_path)
+        self.entries = entries
+        self._dirty = True
+        self.save()
+
+    def close(self):
+        """ Drop the memory map, views handed out before keep the file open until they are gone """
+        self._map = None
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version' : MESH_CACHE_VERSION, 'entries' : self.entries}, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+# Mesh caches by blob path
+_mesh_caches = dict()
+
+def get_mesh_cache_path(filepath):
+    return os.path.splitext(filepath)[0] + MESH_CACHE_EXT
+
+def get_mesh_cache(filepath=None):
+    """ Mesh cache beside a blend file, the current one by default. None if the file is not saved yet """
+    filepath = filepath or bpy.data.filepath
+    if not filepath:
+        return None
+    blob_path = get_mesh_cache_path(filepath)
+    cache = _mesh_caches.get(blob_path)
+    if cache is None:
+        cache = _mesh_caches[blob_path] = MeshCache(blob_path)
+    return cache
+
+def get_conversion_cache(context):
+    if not context.scene.bevel_curve_tools.use_mesh_cache:
+        return None
+    return get_mesh_cache()
+
+def geometry_hash(co, loop_starts, loop_totals, loop_verts, face_materials=None, uvs=None):
+    """ Fingerprint of everything the mesh cache brings back, tells if a baked mesh was edited since """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(co, dtype=np.float32).tobytes())
+    for arr in (loop_starts, loop_totals, loop_verts, face_materials):
+        if arr is not None:
+            h.update(np.ascontiguousarray(arr, dtype=np.int32).tobytes())
+    h.update(b'-' if uvs is None else np.ascontiguousarray(uvs, dtype=np.float32).tobytes())
+    return h.hexdigest()
+
+# Attributes the mesh cache brings back or Blender keeps for itself
+MESH_CACHE_ATTRIBUTES = {'position', 'material_index', 'sharp_face'}
+
+# Edge marks the mesh cache can't bring back
+MESH_CACHE_EDGE_FLAGS = ('use_seam', 'use_edge_sharp', 'use_freestyle_mark')
+
+def get_weighted_meshes():
+    """ Pointers of meshes used by objects with vertex groups """
+    return {o.data.as_pointer() for o in bpy.data.objects if o.type == 'MESH' and o.vertex_groups}
+
+def mesh_has_extra_data(mesh, weighted=()):
+    """ True if mesh holds anything beyond what the mesh cache brings back: weights, colors,
+    attributes, edge marks, custom normals, shape keys, flat faces or more than one uv map """
+    if mesh.shape_keys or len(mesh.uv_layers) > 1 or mesh.as_pointer() in weighted:
+        return True
+    if getattr(mesh, 'has_custom_normals', False):
+        return True
+    if len(getattr(mesh, 'vertex_colors', ())) or len(getattr(mesh, 'face_maps', ())):
+        return True
+
+    # Blender 2.91+ lists every layer as attribute, internal ones start with a dot
+    uv_names = {uv.name for uv in mesh.uv_layers}
+    for attr in getattr(mesh, 'attributes', ()):
+        if not attr.name.startswith('.') and attr.name not in MESH_CACHE_ATTRIBUTES and attr.name not in uv_names:
+            return True
+
+    num_edges = len(mesh.edges)
+    flags = np.empty(num_edges, dtype=bool)
+    for flag in MESH_CACHE_EDGE_FLAGS:
+        if num_edges and hasattr(mesh.edges[0], flag):
+            mesh.edges.foreach_get(flag, flags)
+            if flags.any(): return True
+
+    # Cached meshes come back smooth shaded
+    smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get('use_smooth', smooth)
+    return not smooth.all()
+
+CURVE_HASH_ATTRS = ('dimensions', 'resolution_u', 'twist_mode', 'twist_smooth', 'use_fill_caps',
+        'use_radius', 'use_stretch', 'use_deform_bounds', 'offset', 'extrude', 'bevel_depth',
+        'bevel_resolution', 'bevel_mode', 'fill_mode', 'use_fill_deform', 'use_map_taper',
+        'taper_radius_mode', 'bevel_factor_start', 'bevel_factor_end',
+        'bevel_factor_mapping_start', 'bevel_factor_mapping_end')
+
+SPLINE_HASH_ATTRS = ('type', 'use_cyclic_u', 'resolution_u', 'order_u', 'use_endpoint_u', 'use_bezier_u',
+        'radius_interpolation', 'tilt_interpolation', 'material_index', 'use_smooth')
+
+def hash_curve_data(h, curve):
+    h.update(repr(tuple(getattr(curve, a, None) for a in CURVE_HASH_ATTRS)).encode())
+    for spline in curve.splines:
+        h.update(repr(tuple(getattr(spline, a, None) for a in SPLINE_HASH_ATTRS)).encode())
+        for arr in read_spline_points(spline):
+            h.update(arr.tobytes())
+        if spline.type == 'BEZIER':
+            h.update(repr([(bp.handle_left_type, bp.handle_right_type) for bp in spline.bezier_points]).encode())
+
+def hash_rna_struct(h, struct):
+    """ Hash simple properties of a struct like a modifier, IDs by name """
+    values = list()
+    for prop in struct.bl_rna.properties:
+        ident = prop.identifier
+        if ident == 'rna_type' or prop.type == 'COLLECTION':
+            continue
+        value = getattr(struct, ident, None)
+        if prop.type == 'POINTER':
+            value = value.name if isinstance(value, bpy.types.ID) else None
+        elif isinstance(value, set):
+            value = sorted(value)
+        elif getattr(prop, 'array_length', 0):
+            value = [tuple(v) if hasattr(v, '__len__') else v for v in value]
+        values.append((ident, value))
+    h.update(repr(values).encode())
+
+def curve_content_hash(curve_obj):
+    """ Key of the mesh a curve object converts to, changes with curve, bevel, taper or modifiers """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((MESH_CACHE_VERSION, bl_info['version'], tuple(bpy.app.version))).encode())
+    curve = curve_obj.data
+    hash_curve_data(h, curve)
+    for obj in (curve.bevel_object, curve.taper_object):
+        if obj and obj.type == 'CURVE':
+            hash_curve_data(h, obj.data)
+            h.update(repr(tuple(obj.scale)).encode())
+        else: h.update(b'-')
+    for m in curve_obj.modifiers:
+        hash_rna_struct(h, m)
+    return h.hexdigest()
+
+def bake_mesh(cache, mesh, key):
+    """ Store mesh geometry in cache and tag the mesh with its key """
+    if key not in cache:
+        cache.put(key, get_mesh_buffers(mesh))
+    mesh[MESH_CACHE_KEY] = key
+
+def fill_mesh_from_cache(cache, mesh):
+    """ Bring back geometry of a stripped baked mesh, returns False if it's not in cache """
+    buffers = cache.get(mesh.get(MESH_CACHE_KEY)) if cache else None
+    if buffers is None:
+        return False
+
+    co, loop_starts, loop_totals, loop_verts, face_materials, uvs = buffers
+    fill_mesh_from_buffers(mesh, co, loop_starts, loop_totals, loop_verts, face_materials)
+    if uvs is not None:
+        uv_layer = mesh.uv_layers.active or mesh.uv_layers.new(name=mesh.get(MESH_CACHE_UV_KEY, 'UVMap'))
+        uv_layer.data.foreach_set('uv', uvs.ravel())
+    return True
+
+def fill_stripped_meshes(cache):
+    missing = list()
+    for mesh in bpy.data.meshes:
+        if MESH_CACHE_KEY in mesh and not len(mesh.vertices):
+            if not fill_mesh_from_cache(cache, mesh):
+                missing.append(mesh.name)
+    if missing:
+        print('Bevel Curve Tools: Meshes missing from mesh cache:', ', '.join(missing))
+
+# Names of meshes stripped while saving
+_stripped_meshes = list()
+
+@persistent
+def mesh_cache_save_pre(*args):
+    filepath = args[0] if args and isinstance(args[0], str) and args[0] else bpy.data.filepath
+    scene = bpy.context.scene
+    if not filepath or not scene or not scene.bevel_curve_tools.strip_cached_meshes:
+        return
+
+    # Saving to another place, the cache goes along
+    cache = get_mesh_cache()
+    target_path = get_mesh_cache_path(filepath)
+    if cache and cache.blob_path != target_path and os.path.isfile(cache.blob_path):
+        cache.save()
+        shutil.copyfile(cache.blob_path, target_path)
+        shutil.copyfile(cache.index_path, target_path + '.json')
+        _mesh_caches.pop(target_path, None)
+    target = get_mesh_cache(filepath)
+    weighted = get_weighted_meshes()
+
+    for mesh in bpy.data.meshes:
+        key = mesh.get(MESH_CACHE_KEY)
+        if not key or not len(mesh.vertices) or key not in target:
+            continue
+        # Blender 2.81+ can strip geometry
+        if not hasattr(mesh, 'clear_geometry'):
+            continue
+        # Edited meshes are not baked anymore, edits without moving vertices count too
+        if (mesh_has_extra_data(mesh, weighted) or
+                geometry_hash(*get_mesh_buffers(mesh)) != target.entries[key]['geometry']):
+            del mesh[MESH_CACHE_KEY]
+            continue
+        if mesh.uv_layers:
+            mesh[MESH_CACHE_UV_KEY] = mesh.uv_layers[0].name
+        mesh.clear_geometry()
+        _stripped_meshes.append(mesh.name)
+
+@persistent
+def mesh_cache_save_post(*args):
+    cache = get_mesh_cache()
+    if not cache:
+        return
+
+    for name in _stripped_meshes:
+        mesh = bpy.data.meshes.get(name)
+        if mesh: fill_mesh_from_cache(cache, mesh)
+    _stripped_meshes.clear()
+
+    # Entries baked into meshes always stay, the rest is capped
+    cache.compact({m[MESH_CACHE_KEY] for m in bpy.data.meshes if MESH_CACHE_KEY in m})
+    cache.save()
+
+@persistent
+def mesh_cache_load_post(*args):
+    _mesh_caches.clear()
+    if any(MESH_CACHE_KEY in m and not len(m.vertices) for m in bpy.data.meshes):
+        fill_stripped_meshes(get_mesh_cache())
+
+def clear_mesh_cache():
+    """ Delete cache files of current blend file and untag its baked meshes,
+    returns error message if files can't be deleted """
+    cache = get_mesh_cache()
+    if not cache:
+        return
+
+    # Windows can't delete a mapped file
+    cache.close()
+    _mesh_caches.pop(cache.blob_path, None)
+
+    for mesh in bpy.data.meshes:
+        if MESH_CACHE_KEY in mesh:
+            del mesh[MESH_CACHE_KEY]
+
+    for path in (cache.blob_path, cache.index_path):
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+        except OSError as e:
+            return "Can't delete mesh cache: " + str(e)
+
+class MeshBufferWriter:
+    """ Mesh buffers filled chunk by chunk, allocated once from an estimate of the final size.
+    They only grow if a chunk doesn't fit, so chunks can go as soon as they are written """
+
+    def __init__(self, num_verts, num_faces, num_loops):
+        self.co = np.empty((num_verts, 3), dtype=np.float32)
+        self.loop_starts = np.empty(num_faces, dtype=np.int32)
+        self.loop_totals = np.empty(num_faces, dtype=np.int32)
+        self.loop_verts = np.empty(num_loops, dtype=np.int32)
+        self.face_materials = np.empty(num_faces, dtype=np.int32)
+        self.uvs = None
+        self.num_verts = self.num_faces = self.num_loops = 0
+
+    @staticmethod
+    def reserve(arr, used, needed):
+        if needed <= len(arr):
+            return arr
+        grown = np.empty((max(needed, len(arr) + len(arr) // 2),) + arr.shape[1:], dtype=arr.dtype)
+        grown[:used] = arr[:used]
+        return grown
+
+    def append(self, co, loop_starts, loop_totals, loop_verts, face_materials, uvs=None):
+        vi, fi, li = self.num_verts, self.num_faces, self.num_loops
+        nv, nf, nl = len(co), len(loop_starts), len(loop_verts)
+
+        self.co = self.reserve(self.co, vi, vi + nv)
+        self.loop_starts = self.reserve(self.loop_starts, fi, fi + nf)
+        self.loop_totals = self.reserve(self.loop_totals, fi, fi + nf)
+        self.loop_verts = self.reserve(self.loop_verts, li, li + nl)
+        self.face_materials = self.reserve(self.face_materials, fi, fi + nf)
+
+        self.co[vi:vi + nv] = co
+        self.loop_starts[fi:fi + nf] = loop_starts + li
+        self.loop_totals[fi:fi + nf] = loop_totals
+        self.loop_verts[li:li + nl] = loop_verts + vi
+        self.face_materials[fi:fi + nf] = face_materials
+
+        # Loops of chunks without uvs get zeros once any chunk has them
+        if uvs is not None and self.uvs is None:
+            self.uvs = np.zeros((len(self.loop_verts), 2), dtype=np.float32)
+        if self.uvs is not None:
+            self.uvs = self.reserve(self.uvs, li, li + nl)
+            self.uvs[li:li + nl] = 0.0 if uvs is None else uvs
+
+        self.num_verts += nv
+        self.num_faces += nf
+        self.num_loops += nl
+
+    def buffers(self):
+        """ Filled (co, loop_starts, loop_totals, loop_verts, face_materials, uvs) """
+        nv, nf, nl = self.num_verts, self.num_faces, self.num_loops
+        uvs = self.uvs[:nl] if self.uvs is not None else None
+        return (self.co[:nv], self.loop_starts[:nf], self.loop_totals[:nf], self.loop_verts[:nl],
+                self.face_materials[:nf], uvs)
+
+def merge_curves_to_mesh(context, curve_objs):
+    """ Join evaluated meshes of curve objects into a single new mesh object.
+    Buffers are concatenated directly, no intermediate object is created """
+    if not curve_objs:
+        return None
+
+    target = context.active_object
+    if target not in curve_objs:
+        target = curve_objs[0]
+
+    depsgraph = context.evaluated_depsgraph_get()
+    target_inv = np.array(target.matrix_world.inverted(), dtype=np.float64)
+
+    materials = list()
+    cache = get_conversion_cache(context)
+    keys = list()
+    threads = get_thread_count(context.scene)
+
+    def read_job(o):
+        """ Blender data is only read on the main thread """
+        key = curve_content_hash(o) if cache else None
+        buffers = cache.get(key) if cache else None
+        welded = buffers is not None
+        if not welded:
+            buffers = get_evaluated_mesh_buffers(o, depsgraph)
+        keys.append(key)
+
+        mat = np.dot(target_inv, np.array(o.matrix_world, dtype=np.float64))
+
+        # Remap material slots
+        remap = list()
+        for slot in o.material_slots:
+            if slot.material not in materials:
+                materials.append(slot.material)
+            remap.append(materials.index(slot.material))
+
+        return [buffers, mat, np.array(remap, dtype=np.int32), welded]
+
+    def process(job):
+        (co, ls, lt, lv, mats, uvs), mat, remap, welded = job
+        # Raw buffers go as soon as this job holds the only reference
+        job[0] = None
+
+        # Remove vertex duplication of this object only, cached meshes are already welded
+        baked = None
+        if not welded:
+            co, ls, lt, lv, face_mask, loop_mask = weld_seam_vertices(co, ls, lt, lv)
+            mats = mats[face_mask]
+            if uvs is not None:
+                uvs = uvs[loop_mask]
+            # Welded object space copy is only needed to fill the cache
+            if cache is not None:
+                baked = (co, ls, lt, lv, mats, uvs)
+
+        # Transform into target object space
+        co = (np.dot(co, mat[:3, :3].T) + mat[:3, 3]).astype(np.float32)
+
+        if len(remap):
+            mats = remap[np.minimum(mats, len(remap) - 1)]
+        else: mats = np.zeros(len(mats), dtype=np.int32)
+
+        return (co, ls, lt, lv, mats, uvs), baked
+
+    # Final buffers are sized up front, raw evaluated meshes are read, welded
+    # and copied in a batch at a time
+    writer = MeshBufferWriter(*np.sum([estimate_mesh_sizes(o.data) for o in curve_objs], axis=0))
+    batch_size = max(MERGE_BATCH_CURVES, threads)
+    for start in range(0, len(curve_objs), batch_size):
+        batch = curve_objs[start:start + batch_size]
+        jobs = [read_job(o) for o in batch]
+        results = map_batches(process, jobs, threads)
+        del jobs
+
+        for key, (chunk, baked) in zip(keys[start:], results):
+            if baked is not None and key not in cache:
+                cache.put(key, baked)
+            writer.append(*chunk)
+        del results
+
+    # Merged mesh key covers every curve and its place relative to target
+    merged_key = None
+    if cache:
+        h = hashlib.blake2b(digest_size=16)
+        for key, o in zip(keys, curve_objs):
+            h.update(key.encode())
+            h.update(np.array(o.matrix_world, dtype=np.float64).tobytes())
+            h.update(repr([slot.material.name if slot.material else None for slot in o.material_slots]).encode())
+        h.update(np.array(target.matrix_world, dtype=np.float64).tobytes())
+        merged_key = h.hexdigest()
+
+    co, loop_starts, loop_totals, loop_verts, face_materials, uvs = writer.buffers()
+    has_uvs = uvs is not None
+    del writer
+
+    mesh = new_mesh_from_buffers(target.name, co, loop_starts, loop_totals, loop_verts, face_materials)
+    for mat in materials:
+        mesh.materials.append(mat)
+    if has_uvs:
+        mesh.uv_layers.new().data.foreach_set('uv', uvs.ravel())
+
+    if cache:
+        if merged_key not in cache:
+            cache.put(merged_key, (co, loop_starts, loop_totals, loop_verts, face_materials, uvs))
+        mesh[MESH_CACHE_KEY] = merged_key
+        cache.save()
+
+    merged = bpy.data.objects.new(target.name, mesh)
+    merged.matrix_world = target.matrix_world.copy()
+    for col in target.users_collection:
+        col.objects.link(merged)
+
+    # Remove the curves, merged object takes over the target name
+    name = target.name
+    for o in curve_objs:
+        bpy.data.objects.remove(o, do_unlink=True)
+    merged.name = name
+    mesh.name = name
+
+    set_object_select(merged, True)
+    set_active_object(merged)
+
+    return merged
+
 def convert_curve_to_mesh(context, mode='NOMERGE'):
 
     # Listing selected curve objects
@@ -135,6 +2229,9 @@ def convert_curve_to_mesh(context, mode='NOMERGE'):
             o.type == 'CURVE' and 
             o.data.bevel_object]
 
+    # Conversion always uses full resolution
+    restore_proxy(selected_objs)
+
     if mode == 'UNION' or mode == 'SEPARATE':
 
         for o in selected_objs:
@@ -182,37 +2279,41 @@ def convert_curve_to_mesh(context, mode='NOMERGE'):
         if bev_ob not in not_sel_bev_objs and bev_ob not in bev_objs_to_del:
             bev_objs_to_del.append(bev_ob)
 
+    # Merge straight from evaluated buffers, Blender 2.79 still uses join
+    if mode == 'MERGE' and HAS_DEPSGRAPH:
+        merge_curves_to_mesh(context, selected_objs)
+
+        for o in bev_objs_to_del:
+            bpy.data.objects.remove(o, do_unlink=True)
+
+        # Shared bevel objects of remaining curves go back to proxy
+        refresh_proxy(context.scene)
+        mark_panel_state_dirty()
+        return
+
+    # Content keys must be taken while objects are still curves, union results are not baked
+    cache = get_conversion_cache(context) if mode != 'UNION' else None
+    keys = [curve_content_hash(o) for o in selected_objs] if cache else list()
+
     # convert curve to mesh
     bpy.ops.object.convert(target='MESH')
     
     bpy.ops.object.select_all(action='DESELECT')
 
-    # Unhide collection
-    if is_greater_than_280():
-        col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
-        if col: col.exclude = False
-
+    # Delete unused bevel objects without going through selection
     for o in bev_objs_to_del:
-        # bring to active layer
-        if not is_greater_than_280():
-            for i in range(20):
-                o.layers[i] = context.scene.layers[i]
-        # show and select them
-        hide_object(o, False)
-        set_object_select(o, True)
-    # Delete them objects
-    bpy.ops.object.delete()
+        bpy.data.objects.remove(o, do_unlink=True)
 
     # Remove vertex duplication
     for o in selected_objs:
-        #print(o)
-        set_active_object(o)
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.remove_doubles()
-        bpy.ops.object.editmode_toggle()
+        weld_mesh_object(o)
         set_object_select(o, True)
 
+    if cache and mode != 'MERGE':
+        for o, key in zip(selected_objs, keys):
+            bake_mesh(cache, o.data, key)
+        cache.save()
+
     if mode == 'MERGE':
         bpy.ops.object.join()
     elif mode == 'UNION' and len(selected_objs) > 1:
@@ -224,10 +2325,9 @@ def convert_curve_to_mesh(context, mode='NOMERGE'):
     # Select object
     set_object_select(context.active_object, True)
 
-    # Hide back collection
-    if is_greater_than_280():
-        col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
-        if col: col.exclude = True
+    # Shared bevel objects of remaining curves go back to proxy
+    refresh_proxy(context.scene)
+    mark_panel_state_dirty()
 
 def check_bevel_used_by_other_objects(curve_obj):
 
@@ -241,12 +2341,13 @@ def check_bevel_used_by_other_objects(curve_obj):
 
     return bevel_used
 
-def get_point_rotation(context, scene, curve_obj, index=0, spline_index=0):
+def get_blender_point_rotation(context, scene, curve_obj, index=0, spline_index=0):
+    """ Bevel rotation read from a temporary mesh Blender sweeps along the curve,
+    used for twist modes compute_frames doesn't model """
 
     # Get curve attributes
     curve_mat = curve_obj.matrix_world
     curve = curve_obj.data
-    points = get_spline_points(curve.splines[spline_index])
 
     # new temp object to detect local x-axis and y-axis of first handle
     # Temp Bevel Object for temp curve
@@ -255,6 +2356,7 @@ def get_point_rotation(context, scene, curve_obj, index=0, spline_index=0):
     temp_spline.points.add(2)
     temp_spline.points[0].co = Vector((1.0, 0.0, 0.0, 1.0))
     temp_spline.points[1].co = Vector((0.0, 1.0, 0.0, 1.0))
+    temp_spline.points[2].co = Vector((0.0, 0.0, 0.0, 1.0))
     temp_bevel_obj = bpy.data.objects.new('__temp_bevel', temp_bevel_curve)
     link_object(scene, temp_bevel_obj)
     # Temp Curve
@@ -293,12 +2395,16 @@ def get_point_rotation(context, scene, curve_obj, index=0, spline_index=0):
     #offset += spline_index * curve.resolution_u
     #print(offset)
 
-    # get x-axis and y-axis of the first handle
-    handle_x = temp_obj.data.vertices[curve.resolution_u * (index + offset) * 3 + micro_offset * 3].co
-    handle_y = temp_obj.data.vertices[curve.resolution_u * (index + offset) * 3 + 1 + micro_offset * 3].co
+    # get x-axis and y-axis of the first handle, measured from the profile origin
+    # since nurbs curves don't pass through their points
+    vertices = temp_obj.data.vertices
+    ring = min(curve.resolution_u * (index + offset) + micro_offset, len(vertices) // 3 - 1)
+    handle_x = vertices[ring * 3].co
+    handle_y = vertices[ring * 3 + 1].co
+    center = vertices[ring * 3 + 2].co
 
-    target_x = handle_x - points[index].co.xyz
-    target_y = handle_y - points[index].co.xyz
+    target_x = handle_x - center
+    target_y = handle_y - center
     target_x.normalize()
     target_y.normalize()
 
@@ -322,46 +2428,1065 @@ def get_point_rotation(context, scene, curve_obj, index=0, spline_index=0):
 
     return mul(rot_2, rot_1)
 
+def frames_match_blender(curve):
+    """ compute_frames follows minimum twist of 3D curves only """
+    return curve.dimensions == '3D' and curve.twist_mode == 'MINIMUM' and curve.twist_smooth == 0.0
+
+def get_point_rotation(context, scene, curve_obj, index=0, spline_index=0):
+
+    if not frames_match_blender(curve_obj.data):
+        return get_blender_point_rotation(context, scene, curve_obj, index, spline_index)
+
+    # Get curve attributes
+    curve_mat = curve_obj.matrix_world
+    evaluation = get_curve_evaluation(curve_obj.data)
+    samples = evaluation.samples
+    if samples.offsets[spline_index] == samples.offsets[spline_index + 1]:
+        return Quaternion()
+
+    # x-axis and y-axis of bevel profile at the point, same frames as the bevel sweep
+    tangents, normals, binormals = evaluation.frames
+    row = samples.point_sample(index, spline_index)
+    target_x = Vector(normals[row])
+    target_y = Vector(binormals[row])
+
+    # Match bevel x-axis to handle x-axis
+    bevel_x = Vector((1.0, 0.0, 0.0))
+    target_x = mul(curve_mat.to_3x3(), target_x)
+    target_x.normalize()
+    rot_1 = bevel_x.rotation_difference(target_x)
+
+    # Match bevel y-axis to handle y-axis
+    bevel_y = mul(rot_1.to_matrix(), Vector((0.0, 1.0, 0.0)))
+    target_y = mul(curve_mat.to_3x3(), target_y)
+    target_y.normalize()
+    rot_2 = bevel_y.rotation_difference(target_y)
+
+    return mul(rot_2, rot_1)
+
 def get_proper_index_bevel_placement(curve_obj):
     """ Returns (spline index, point index) """
+    curve = curve_obj.data
+    samples = get_curve_evaluation(curve).samples
+    splines = curve.splines
+
+    # Prioritising radius of 1.0, nurbs take their second point
+    for i, spline in enumerate(splines):
+        radii = samples.point_radii[samples.spline_points(i)]
+        if spline.type == 'NURBS':
+            if len(radii) > 1:
+                return (i, 1)
+            continue
+        found = np.nonzero(radii == 1.0)[0]
+        if len(found):
+            return (i, int(found[0]))
+
+    # Otherwise get the biggest radius under 1.0
     idx = (0, 0)
-    found = False
-
-    for i, spline in enumerate(curve_obj.data.splines):
-        points = get_spline_points(spline)
-        # Prioritising radius of 1.0
-        for j, point in enumerate(points):
-            if spline.type == 'NURBS':
-                if j > 0:
-                    idx = (i, j)
-                    found = True
-                    break
-            elif point.radius == 1.0:
-                idx = (i, j)
-                found = True
-                break
-        if found:
-            break
+    if not len(samples.point_radii):
+        return idx
+    old_radius = samples.point_radii[0]
+    for i, spline in enumerate(splines):
+        radii = samples.point_radii[samples.spline_points(i)]
+        if spline.type == 'NURBS':
+            if len(radii) > 1:
+                idx = (i, 1)
+                old_radius = radii[1]
+            continue
+        candidates = np.nonzero((radii <= 1.0) & (radii >= 0.3))[0]
+        if not len(candidates):
+            continue
+        j = int(candidates[np.argmax(radii[candidates])])
+        if radii[j] > old_radius or old_radius > 1.0:
+            idx = (i, j)
+            old_radius = radii[j]
 
-    # If still not found do another loop
-    if not found:
-        for i, spline in enumerate(curve_obj.data.splines):
-            points = get_spline_points(spline)
-            for j, point in enumerate(points):
-                if spline.type == 'NURBS':
-                    if j > 0:
-                        idx = (i, j)
-                        break
-                elif point.radius <= 1.0 and point.radius >= 0.3:
-                    temp_ps = get_spline_points(curve_obj.data.splines[idx[0]])
-                    old_radius = temp_ps[idx[1]].radius
-                    # get the biggest radius under 1.0
-                    if point.radius > old_radius or old_radius > 1.0:
-                        idx = (i, j)
-    
-    #print(idx)
     return idx
 
+def subdivide_splines(curve):
+    """ Insert a point in the middle of every segment, same as curve subdivide but without edit mode """
+    for spline in curve.splines:
+        co, radius, tilt = read_spline_points(spline)
+        n = len(radius)
+        if n < 2: continue
+
+        segs = n if spline.use_cyclic_u else n - 1
+        a = np.arange(segs)
+        b = (a + 1) % n
+        new_n = n + segs
+
+        # Original points on even indices, new points right after their segment start
+        old_idx = np.arange(n) * 2
+        new_idx = a * 2 + 1
+
+        new_radius = np.empty(new_n, dtype=np.float32)
+        new_tilt = np.empty(new_n, dtype=np.float32)
+        new_radius[old_idx] = radius
+        new_tilt[old_idx] = tilt
+        new_radius[new_idx] = (radius[a] + radius[b]) * 0.5
+        new_tilt[new_idx] = (tilt[a] + tilt[b]) * 0.5
+
+        if spline.type == 'BEZIER':
+            bps = spline.bezier_points
+            types = [(bp.handle_left_type, bp.handle_right_type) for bp in bps]
+
+            # de Casteljau split at the middle keeps the shape
+            q0 = (co[a, 1] + co[a, 2]) * 0.5
+            q1 = (co[a, 2] + co[b, 0]) * 0.5
+            q2 = (co[b, 0] + co[b, 1]) * 0.5
+            r0 = (q0 + q1) * 0.5
+            r1 = (q1 + q2) * 0.5
+
+            new_co = np.empty((new_n, 3, 3), dtype=np.float32)
+            new_co[old_idx] = co
+            new_co[old_idx[a], 2] = q0
+            new_co[old_idx[b], 0] = q2
+            new_co[new_idx, 0] = r0
+            new_co[new_idx, 1] = (r0 + r1) * 0.5
+            new_co[new_idx, 2] = r1
+
+            bps.add(segs)
+            for i, bp in enumerate(bps):
+                bp.handle_left_type, bp.handle_right_type = types[i // 2]
+
+            for i, attr in enumerate(('handle_left', 'co', 'handle_right')):
+                bps.foreach_set(attr, np.ascontiguousarray(new_co[:, i]).ravel())
+            points = bps
+        else:
+            new_co = np.empty((new_n, 4), dtype=np.float32)
+            new_co[old_idx] = co
+            new_co[new_idx] = (co[a] + co[b]) * 0.5
+            points = spline.points
+            points.add(segs)
+            points.foreach_set('co', new_co.ravel())
+
+        points.foreach_set('radius', new_radius)
+        points.foreach_set('tilt', new_tilt)
+
+    invalidate_curve_evaluation(curve)
+
+def simplify_mask(co, radius, tilt, cyclic=False, tolerance=0.001, radius_tolerance=0.01, tilt_tolerance=0.0175,
+        min_points=2):
+    """ Douglas-Peucker over control points, returns mask of points to keep.
+    A point is dropped only if its position, radius and tilt all stay within tolerance of
+    the chord between kept neighbours. Errors are measured on the control polygon,
+    bezier splines are checked on the evaluated curve afterwards by refine_bezier_mask.
+    Endpoints are always kept """
+    n = len(co)
+    keep = np.ones(n, dtype=bool)
+    if n < (4 if cyclic else 3):
+        return keep
+
+    co = np.asarray(co, dtype=np.float64)
+    radius = np.asarray(radius, dtype=np.float64)
+    tilt = np.asarray(tilt, dtype=np.float64)
+
+    if cyclic:
+        # Cut the loop at the point farthest from the first one, then close it back to the first
+        far = int(np.argmax(np.linalg.norm(co - co[0], axis=1))) or n // 2
+        idx = np.append(np.arange(n), 0)
+        ranges = [(0, far), (far, n)]
+    else:
+        idx = np.arange(n)
+        ranges = [(0, n - 1)]
+
+    pos = co[idx]
+    rad = radius[idx]
+    til = tilt[idx]
+    length = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(pos, axis=0), axis=1))))
+    tols = [max(t, 1e-12) for t in (tolerance, radius_tolerance, tilt_tolerance)]
+
+    kept = np.zeros(len(idx), dtype=bool)
+    for i, j in ranges:
+        kept[i] = kept[j] = True
+
+    stack = list(ranges)
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2: continue
+        k = np.arange(i + 1, j)
+
+        # Distance to the chord
+        ab = pos[j] - pos[i]
+        denom = np.dot(ab, ab)
+        t = np.clip(np.dot(pos[k] - pos[i], ab) / denom, 0.0, 1.0) if denom > 0.0 else np.zeros(len(k))
+        dist = np.linalg.norm(pos[k] - (pos[i] + t[:, None] * ab), axis=1)
+
+        # Radius and tilt are interpolated by length along the original points
+        span = length[j] - length[i]
+        s = (length[k] - length[i]) / span if span > 0.0 else (k - i) / float(j - i)
+        err = np.maximum.reduce([
+            dist / tols[0],
+            np.abs(rad[k] - (rad[i] + s * (rad[j] - rad[i]))) / tols[1],
+            np.abs(til[k] - (til[i] + s * (til[j] - til[i]))) / tols[2]])
+
+        worst = int(np.argmax(err))
+        if err[worst] > 1.0:
+            m = k[worst]
+            kept[m] = True
+            stack.append((i, m))
+            stack.append((m, j))
+
+    keep = kept[:n]
+
+    # Cyclic splines need a third point, nurbs need enough points for their order
+    if cyclic:
+        min_points = max(min_points, 3)
+    if keep.sum() < min_points:
+        keep[np.round(np.linspace(0, n - 1, min(min_points, n))).astype(np.int64)] = True
+        if cyclic and keep.sum() < min_points:
+            keep[np.flatnonzero(~keep)[:min_points - keep.sum()]] = True
+
+    return keep
+
+# Spline settings copied to rebuilt splines, order is set after points exist
+SPLINE_SETTINGS = ('use_cyclic_u', 'resolution_u', 'use_endpoint_u', 'use_bezier_u', 'order_u',
+        'use_smooth', 'material_index', 'radius_interpolation', 'tilt_interpolation')
+
+# Per point select and hide state kept on rebuilt splines
+BEZIER_POINT_FLAGS = ('select_control_point', 'select_left_handle', 'select_right_handle', 'hide')
+SPLINE_POINT_FLAGS = ('select', 'hide')
+
+def read_spline(spline):
+    co, radius, tilt = read_spline_points(spline)
+    handle_types = None
+    points = get_spline_points(spline)
+    if spline.type == 'BEZIER':
+        handle_types = [(bp.handle_left_type, bp.handle_right_type) for bp in points]
+    flags = dict()
+    for flag in BEZIER_POINT_FLAGS if spline.type == 'BEZIER' else SPLINE_POINT_FLAGS:
+        flags[flag] = np.empty(len(points), dtype=bool)
+        points.foreach_get(flag, flags[flag])
+    settings = {attr : getattr(spline, attr) for attr in SPLINE_SETTINGS}
+    return spline.type, co, radius, tilt, handle_types, flags, settings
+
+def write_spline(curve, spline_type, co, radius, tilt, handle_types, flags, settings):
+    spline = curve.splines.new(spline_type)
+    n = len(radius)
+    if spline_type == 'BEZIER':
+        points = spline.bezier_points
+        points.add(n - 1)
+        for bp, (left, right) in zip(points, handle_types):
+            bp.handle_left_type, bp.handle_right_type = left, right
+        for i, attr in enumerate(('handle_left', 'co', 'handle_right')):
+            points.foreach_set(attr, np.ascontiguousarray(co[:, i], dtype=np.float32).ravel())
+    else:
+        points = spline.points
+        points.add(n - 1)
+        points.foreach_set('co', np.ascontiguousarray(co, dtype=np.float32).ravel())
+    points.foreach_set('radius', np.ascontiguousarray(radius, dtype=np.float32))
+    points.foreach_set('tilt', np.ascontiguousarray(tilt, dtype=np.float32))
+    for flag, values in flags.items():
+        points.foreach_set(flag, np.ascontiguousarray(values, dtype=bool))
+
+    for attr in SPLINE_SETTINGS:
+        setattr(spline, attr, settings[attr])
+
+def scale_bezier_handles(co, keep, cyclic=False):
+    """ Scale handles of kept bezier points by how much longer their segments got,
+    so handle directions stay and segments don't collapse to straight lines """
+    n = len(co)
+    kept = np.flatnonzero(keep)
+    pos = co[:, 1].astype(np.float64)
+    new = co[kept].astype(np.float64)
+
+    for side, step in ((0, -1), (2, 1)):
+        old_len = np.linalg.norm(pos[(kept + step) % n] - pos[kept], axis=1)
+        new_len = np.linalg.norm(pos[np.roll(kept, -step)] - pos[kept], axis=1)
+        factor = np.where(old_len > 0.0, new_len / np.maximum(old_len, 1e-12), 1.0)
+        if not cyclic:
+            # Spline ends have no segment on the outer side
+            factor[0 if step < 0 else -1] = 1.0
+        new[:, side] = pos[kept] + (new[:, side] - pos[kept]) * factor[:, None]
+
+    return new
+
+# Samples per original bezier segment when checking a rebuilt segment
+SIMPLIFY_SAMPLES = 8
+
+def arc_fractions(line):
+    length = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(line, axis=0), axis=1))))
+    return length / max(length[-1], 1e-12)
+
+def polyline_distance(points, line, window):
+    """ Distance from each point of a polyline to another polyline. Only segments of line within
+    window of the point's fraction of length are searched, missing the nearest one can only overestimate """
+    start = line[:-1]
+    edge = line[1:] - start
+    length2 = np.maximum(np.einsum('ij,ij->i', edge, edge), 1e-24)
+    center = np.searchsorted(arc_fractions(line), arc_fractions(points))
+    seg = np.clip(center[:, None] + np.arange(-window, window + 1), 0, len(edge) - 1)
+    rel = points[:, None] - start[seg]
+    t = np.clip(np.einsum('pwi,pwi->pw', rel, edge[seg]) / length2[seg], 0.0, 1.0)
+    return np.linalg.norm(rel - t[:, :, None] * edge[seg], axis=2).min(axis=1)
+
+def refine_bezier_mask(co, keep, cyclic=False, tolerance=0.001, samples=SIMPLIFY_SAMPLES):
+    """ Keep more bezier points until every rebuilt segment, evaluated with the handles
+    scale_bezier_handles gives it, stays within tolerance of the original curve.
+    Handles of a rebuilt segment only depend on its two kept points, so segments are checked one by one """
+    n = len(co)
+    co = np.asarray(co, dtype=np.float64)
+    pos = co[:, 1]
+    keep = keep.copy()
+    kept = np.flatnonzero(keep)
+    stack = list(zip(kept[:-1], kept[1:]))
+    if cyclic: stack.append((kept[-1], kept[0] + n))
+    t = np.linspace(0.0, 1.0, samples, endpoint=False)
+
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2: continue
+        idx = np.arange(a, b + 1) % n
+        i, j = idx[0], idx[-1]
+
+        # Original point k of the span is sample k * samples
+        ctrl = np.stack((pos[idx[:-1]], co[idx[:-1], 2], co[idx[1:], 0], pos[idx[1:]]), axis=1)
+        original = np.concatenate((bezier_eval(ctrl, t)[0].reshape(-1, 3), pos[j][None]))
+
+        chord = np.linalg.norm(pos[j] - pos[i])
+        right = (co[i, 2] - pos[i]) * chord / max(np.linalg.norm(pos[idx[1]] - pos[i]), 1e-12)
+        left = (co[j, 0] - pos[j]) * chord / max(np.linalg.norm(pos[idx[-2]] - pos[j]), 1e-12)
+        ctrl = np.array([[pos[i], pos[i] + right, pos[j] + left, pos[j]]])
+        rebuilt = bezier_eval(ctrl, np.linspace(0.0, 1.0, len(original)))[0][0]
+
+        dist = polyline_distance(original, rebuilt, 2 * samples)
+        if max(dist.max(), polyline_distance(rebuilt, original, 2 * samples).max()) <= tolerance:
+            continue
+
+        # Split at the point farthest from the rebuilt segment, or halfway if only handles are off
+        dist = dist[samples:-1:samples]
+        m = a + 1 + int(np.argmax(dist)) if dist.max() > tolerance else (a + b) // 2
+        keep[m % n] = True
+        stack.append((a, m))
+        stack.append((m, b))
+
+    return keep
+
+def get_simplify_error(curve):
+    """ Reason curve data can't be simplified, None if it can.
+    Rebuilt splines would lose shape keys and hook assignments """
+    if curve.shape_keys:
+        return "Curve " + curve.name + " has shape keys"
+    for o in bpy.data.objects:
+        if o.data == curve and any(m.type == 'HOOK' for m in o.modifiers):
+            return "Curve " + curve.name + " has hooks"
+    return None
+
+def simplify_curve(curve, tolerance=0.001, radius_tolerance=0.01, tilt_tolerance=0.0175):
+    """ Drop control points within tolerances of position, radius and tilt (radians) on every
+    spline of curve data. Splines are rebuilt in the same order, endpoints, cyclic flags and
+    point selection stay. Curves with shape keys or hooks are left alone, see get_simplify_error.
+    Returns (point count before, point count after) """
+    if get_simplify_error(curve):
+        count = count_curve_points(curve)
+        return count, count
+
+    splines = [read_spline(s) for s in curve.splines]
+    before = after = 0
+    rebuilt = []
+
+    for spline_type, co, radius, tilt, handle_types, flags, settings in splines:
+        cyclic = settings['use_cyclic_u']
+        positions = co[:, 1] if spline_type == 'BEZIER' else co[:, :3]
+        min_points = settings['order_u'] if spline_type == 'NURBS' else 2
+        keep = simplify_mask(positions, radius, tilt, cyclic, tolerance, radius_tolerance, tilt_tolerance, min_points)
+        if spline_type == 'BEZIER':
+            keep = refine_bezier_mask(co, keep, cyclic, tolerance)
+
+        before += len(keep)
+        after += int(keep.sum())
+
+        if spline_type == 'BEZIER':
+            new_co = scale_bezier_handles(co, keep, cyclic)
+            handle_types = [handle_types[i] for i in np.flatnonzero(keep)]
+        else: new_co = co[keep]
+        flags = {flag : values[keep] for flag, values in flags.items()}
+        rebuilt.append((spline_type, new_co, radius[keep], tilt[keep], handle_types, flags, settings))
+
+    if after == before:
+        return before, after
+
+    # Points can't be removed through the api, so every spline is made again to keep their order
+    curve.splines.clear()
+    for spline in rebuilt:
+        write_spline(curve, *spline)
+
+    invalidate_curve_evaluation(curve)
+    return before, after
+
+def count_curve_points(curve):
+    return sum(len(get_spline_points(s)) for s in curve.splines)
+
+def count_profile_points(curve):
+    return sum(len(coords) for coords, closed in get_bevel_profiles(curve)) or 1
+
+def estimate_mesh_vertices(curve, profile_points=None):
+    """ Vertices of the mesh curve converts to, rings along the curve times bevel profile points.
+    Profile points of the current bevel are used if not given """
+    if profile_points is None:
+        profile_points = count_profile_points(curve)
+    return len(get_curve_evaluation(curve).samples) * profile_points
+
+def estimate_mesh_sizes(curve):
+    """ (vertices, faces, loops) of the welded mesh beveled curve converts to: rings of every
+    bevel profile part, quads between them and caps, triangulated or not. Rings are counted from
+    point counts without evaluating, vector handles can only make less of them.
+    Modifiers, extrusion and bevel depth without a bevel object can make more """
+    rings = segments = ends = 0
+    for spline in curve.splines:
+        n = len(get_spline_points(spline))
+        if n < 2: continue
+        cyclic = spline.use_cyclic_u
+        if spline.type == 'POLY':
+            count = n
+        else: count = max(spline.resolution_u, 1) * (n if cyclic else n - 1) + (spline.type == 'BEZIER' and not cyclic)
+        rings += count
+        segments += count if cyclic and count > 2 else count - 1
+        ends += 0 if cyclic else 2
+    if not getattr(curve, 'use_fill_caps', False):
+        ends = 0
+
+    verts = faces = loops = 0
+    for coords, closed in get_bevel_profiles(curve):
+        m = len(coords)
+        quads = segments * (m if closed else m - 1)
+        verts += rings * m
+        faces += quads
+        loops += 4 * quads
+        if closed and m > 2:
+            faces += ends * (m - 2)
+            loops += ends * max(3 * (m - 2), m)
+    return verts, faces, loops
+
+def format_reduction(label, before, after):
+    percent = 100.0 * (after - before) / before if before else 0.0
+    return "%s %d to %d (%+.1f%%)" % (label, before, after, percent)
+
+def center_profile(coords):
+    coords = np.asarray(coords, dtype=np.float32)
+    return coords - coords.mean(axis=0)
+
+# Predefined shapes, the extra point on origin was always part of these profiles
+BUILTIN_PROFILES = {name : [(center_profile(coords + [(0.0, 0.0)]), True)] for name, coords in (
+    ('TRIANGLE', [
+        (-0.055, 0.0), (-0.06, 0.01),
+        (-0.005, 0.1), (0.005, 0.1),
+        (0.06, 0.01), (0.055, 0.0)]),
+    ('HALFCIRCLE', [
+        (-0.06, 0.0), (-0.06, 0.01),
+        (-0.045, 0.07), (0.0, 0.1), (0.045, 0.07),
+        (0.06, 0.01), (0.06, 0.0)]),
+    ('CIRCLE', [
+        (-0.036, 0.014), (-0.05, 0.05),
+        (-0.036, 0.086), (0.0, 0.1), (0.036, 0.086),
+        (0.05, 0.05), (0.036, 0.014)]),
+    ('SQUARE', [
+        (0.0, 0.04), (0.01, 0.05),
+        (0.09, 0.05), (0.1, 0.04),
+        (0.1, 0.0),
+        (0.1, -0.04), (0.09, -0.05),
+        (0.01, -0.05), (0.0, -0.04)]),
+    )}
+
+# User profiles as {name : [(coords, closed), ...]}, loaded on first use
+_profile_library = None
+
+# Blender needs the items of dynamic enums to stay referenced
+_custom_profile_items = []
+
+def normalize_profile(profile):
+    """ Center profile parts on their point average and scale the bigger side to PROFILE_SIZE """
+    points = np.concatenate([coords for coords, closed in profile])
+    center = points.mean(axis=0)
+    size = np.ptp(points, axis=0).max()
+    fac = PROFILE_SIZE / size if size > 1e-8 else 1.0
+    return [(((coords - center) * fac).astype(np.float32), bool(closed)) for coords, closed in profile]
+
+def get_profile_library_path(create=False):
+    folder = bpy.utils.user_resource('CONFIG', path=PROFILE_LIBRARY_DIR, create=create)
+    return os.path.join(folder, PROFILE_LIBRARY_FILE)
+
+def read_profile_file(path):
+    """ Profiles are stored as flat arrays, parts and points are split back by their counts """
+    library = dict()
+    if not os.path.isfile(path):
+        return library
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            names = data['names']
+            part_counts = data['part_counts']
+            closed = data['closed']
+            point_counts = data['point_counts']
+            coords = data['coords']
+    except (OSError, KeyError, ValueError) as e:
+        print('Bevel Curve Tools: Cannot read profile library', path, e)
+        return library
+
+    point_offsets = np.concatenate(([0], np.cumsum(point_counts)))
+    part = 0
+    for name, count in zip(names, part_counts):
+        library[str(name)] = [(coords[point_offsets[i]:point_offsets[i + 1]], bool(closed[i]))
+                for i in range(part, part + count)]
+        part += count
+
+    return library
+
+def write_profile_file(path, library):
+    names = sorted(library)
+    parts = [part for name in names for part in library[name]]
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f,
+                names=np.array(names, dtype=str),
+                part_counts=np.array([len(library[name]) for name in names], dtype=np.int32),
+                closed=np.array([closed for coords, closed in parts], dtype=bool),
+                point_counts=np.array([len(coords) for coords, closed in parts], dtype=np.int32),
+                coords=np.concatenate([coords for coords, closed in parts]).astype(np.float32)
+                    if parts else np.zeros((0, 2), dtype=np.float32))
+    os.replace(tmp_path, path)
+
+def get_profile_library():
+    global _profile_library
+    if _profile_library is None:
+        _profile_library = read_profile_file(get_profile_library_path())
+    return _profile_library
+
+def save_user_profile(name, profile):
+    library = get_profile_library()
+    library[name] = normalize_profile(profile)
+    write_profile_file(get_profile_library_path(create=True), library)
+
+def remove_user_profile(name):
+    library = get_profile_library()
+    if library.pop(name, None) is not None:
+        write_profile_file(get_profile_library_path(create=True), library)
+
+def get_profile(shape='TRIANGLE', custom_profile=''):
+    """ Profile parts of a predefined shape or a saved profile, None if it doesn't exist """
+    if shape == 'CUSTOM':
+        return get_profile_library().get(custom_profile)
+    return BUILTIN_PROFILES.get(shape)
+
+def custom_profile_items(self, context):
+    _custom_profile_items[:] = [(name, name, "") for name in sorted(get_profile_library())]
+    if not _custom_profile_items:
+        _custom_profile_items.append(('NONE', "None", "No saved profiles yet"))
+    return _custom_profile_items
+
+def add_profile_splines(curve, profile, scale=(1.0, 1.0)):
+    """ Add poly splines of profile parts to curve data, one bulk write per part """
+    scale = np.array(scale, dtype=np.float32)
+    for coords, closed in profile:
+        spline = curve.splines.new('POLY')
+        spline.use_cyclic_u = closed
+        spline.points.add(len(coords) - 1)
+        co = np.zeros((len(coords), 4), dtype=np.float32)
+        co[:, :2] = coords * scale
+        co[:, 3] = 1.0
+        spline.points.foreach_set('co', co.ravel())
+
+def add_bevel_to_curve(context, curve_obj, shape='TRIANGLE', scale_x=1.0, scale_y=1.0, rotation=0.0, falloff='ONETIP', subsurf=False,
+        custom_profile='', falloff_power=1.0, simplify=False, simplify_tolerance=0.001,
+        simplify_radius_tolerance=0.01, simplify_tilt_tolerance=0.0175):
+    """ Add or override bevel of curve object, returns error message if it fails """
+
+    scn = context.scene
+    curve = curve_obj.data
+
+    profile = get_profile(shape, custom_profile)
+    if not profile:
+        return "Bevel profile not found"
+
+    # Work on full resolution
+    restore_proxy([curve_obj])
+
+    # Dense curves get lighter before every per point step below
+    if simplify:
+        error = get_simplify_error(curve)
+        if error:
+            return error + ", it can't be simplified"
+        simplify_curve(curve, simplify_tolerance, simplify_radius_tolerance, simplify_tilt_tolerance)
+
+    # Blender 2.91+ need bevel mode to be set to object
+    set_bevel_mode_object(curve)
+
+    # First spline
+    splines = curve_obj.data.splines
+    points = get_spline_points(splines[0])
+
+    if len(points) < 2:
+        return "Just one point wouldn't do it"
+    
+    if len(points) == 2 and falloff == 'DUALTIP':
+        subdivide_splines(curve)
+        # spline data changes, so it must be retreived again
+        splines = curve_obj.data.splines
+        points = get_spline_points(splines[0])
+
+    # Spline setup
+    for spline in splines:
+        # Cardinal is better
+        spline.tilt_interpolation = 'CARDINAL'
+        spline.radius_interpolation = 'CARDINAL'
+
+        # Set tilt rotation
+        ps = get_spline_points(spline)
+        ps.foreach_set('tilt', np.full(len(ps), rotation, dtype=np.float32))
+
+    apply_radius_falloff([curve], FALLOFF_TIPS[falloff], falloff_power)
+
+    # Radius and tilt changed, depsgraph only catches up after the operator
+    invalidate_curve_evaluation(curve)
+
+    # Delete old bevel object if it's already there
+    if curve.bevel_object:
+
+        # Check if other object using this bevel object
+        bevel_used = check_bevel_used_by_other_objects(curve_obj)
+        
+        if not bevel_used:
+            # Delete old bevel object
+            bpy.data.objects.remove(curve.bevel_object, do_unlink=True)
+
+    # New object and curve data
+    bevel_curve = bpy.data.curves.new(curve_obj.name + '_bevel', 'CURVE')
+    bevel_curve.dimensions = '3D'
+    bevel_curve.resolution_u = 2
+    hide_curve_normals(bevel_curve)
+
+    # Profiles are already centered, so only scaling is left
+    add_profile_splines(bevel_curve, profile, (scale_x, scale_y))
+
+    # Create new bevel object
+    bevel_obj = bpy.data.objects.new(curve_obj.name + '_bevel', bevel_curve)
+    link_new_bevel_object(scn, bevel_obj)
+
+    # Add bevel to curve
+    curve.bevel_object = bevel_obj
+    curve.use_fill_caps = True
+    mark_panel_state_dirty()
+    
+    if falloff == 'DUALTIP':
+        midindex = int((len(points)-1)/2)
+        bevel_rotation = get_point_rotation(context, scn, curve_obj, index=midindex)
+        bevel_position = get_point_position(curve_obj, index=midindex)
+    else: 
+        bevel_rotation = get_point_rotation(context, scn, curve_obj)
+        bevel_position = get_point_position(curve_obj)
+
+    # Set object rotation and location
+    bevel_obj.rotation_mode = 'QUATERNION'
+    bevel_obj.rotation_quaternion = bevel_rotation
+    bevel_obj.location = bevel_position
+
+    # Send bevel object to bevel collection, hidden by default
+    store_bevel_object(context, bevel_obj, curve_obj)
+    hide_bevel_objects(context)
+
+    # Add/remove subsurf
+    subsurf_found = False
+    modifiers = curve_obj.modifiers
+    for m in modifiers:
+        if m.type == 'SUBSURF':
+            subsurf_found = True
+    
+    if subsurf == False:
+        if subsurf_found == True:
+            for m in [m for m in modifiers if m.type == 'SUBSURF']:
+                modifiers.remove(m)
+
+    if subsurf == True:
+        if subsurf_found == False:
+            modifiers.new('Subdivision', 'SUBSURF')
+
+    refresh_proxy(scn, [curve_obj])
+
+def get_bevel_collection(scene):
+    """ Collection holding every bevel object, view layers exclude it to hide them all at once """
+    col = get_set_collection(HIDDEN_COLLECTION_NAME, scene.collection)
+    if col.name not in scene.collection.children:
+        scene.collection.children.link(col)
+    return col
+
+def set_bevel_collection_visible(context, visible):
+    layer_col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
+    if layer_col: layer_col.exclude = not visible
+
+def store_bevel_object(context, bevel_obj, owner=None):
+    """ Link bevel object to the bevel collection, or move it to layer 20 on Blender 2.79, and hide it.
+    Collections of the user keep it, linked library collections can't be changed anyway.
+    Owner curve is written on the bevel object, so it never has to be searched """
+    link_bevel_object(context.scene, bevel_obj, owner)
+
+def link_bevel_object(scene, bevel_obj, owner=None):
+    if owner:
+        bevel_obj[BEVEL_OWNER_KEY] = owner
+
+    store_in_bevel_place(scene, bevel_obj)
+    hide_object(bevel_obj, True)
+
+def get_bevel_owner(bevel_obj):
+    """ Curve object the bevel object was stored for, None if it doesn't use it any more """
+    owner = bevel_obj.get(BEVEL_OWNER_KEY)
+    if owner and owner.type == 'CURVE' and owner.data.bevel_object == bevel_obj:
+        return owner
+    return None
+
+def migrate_bevel_objects(scene):
+    """ Store bevel objects of files made before owners were recorded, once per file load """
+    for obj in scene.objects:
+        if obj.type == 'CURVE':
+            bevel_obj = obj.data.bevel_object
+            if bevel_obj and BEVEL_OWNER_KEY not in bevel_obj:
+                link_bevel_object(scene, bevel_obj, obj)
+
+@persistent
+def bevel_objects_load_post(*args):
+    for scene in bpy.data.scenes:
+        migrate_bevel_objects(scene)
+
+def show_bevel_object(context, owner, bevel_obj):
+    """ Show bevel object of owner curve for editing, it's remembered so hiding knows which one """
+    settings = context.scene.bevel_curve_tools
+    settings.edit_bevel_owner = owner
+    settings.edit_bevel_object = bevel_obj
+
+    show_bevel_place(context, bevel_obj)
+    hide_object(bevel_obj, False)
+
+def hide_bevel_objects(context):
+    """ Hide the bevel object shown for editing and the bevel collection. Every other bevel
+    object was hidden when it was stored, older files are stored on load, so nothing is searched """
+    settings = context.scene.bevel_curve_tools
+    if settings.edit_bevel_object:
+        store_bevel_object(context, settings.edit_bevel_object)
+
+    hide_bevel_place(context)
+
+    settings.edit_bevel_object = None
+    settings.edit_bevel_owner = None
+
+def get_bevel_pointer(data):
+    """ Pointer of the bevel object of curve object or curve data, None if it has none """
+    if isinstance(data, bpy.types.Object):
+        data = data.data if data.type == 'CURVE' else None
+    if data is None or not data.bevel_object:
+        return None
+    return data.bevel_object.as_pointer()
+
+class PanelState:
+    """ Bevel ownership of a view layer, as object pointers.
+    Polls read it instead of scanning the scene. It's only rebuilt when a curve changes its
+    bevel object or objects are added or removed, see is_stale """
+
+    def __init__(self, objects, key):
+        self.key = key
+        self.owners = dict()
+        self.curves = dict()
+        self.count = len(objects)
+        for o in objects:
+            pointer = get_bevel_pointer(o)
+            if pointer:
+                self.owners[o.as_pointer()] = pointer
+                self.curves[o.data.as_pointer()] = pointer
+        self.bevel_objects = set(self.owners.values())
+
+    def is_stale(self, depsgraph):
+        """ Updated objects and curves are checked against recorded bevel objects,
+        removed objects only show as a different object count """
+        for update in depsgraph.updates:
+            data = update.id.original
+            if isinstance(data, bpy.types.Object):
+                if get_bevel_pointer(data) != self.owners.get(data.as_pointer()):
+                    return True
+            elif isinstance(data, bpy.types.Curve):
+                if get_bevel_pointer(data) != self.curves.get(data.as_pointer()):
+                    return True
+            elif isinstance(data, (bpy.types.Collection, bpy.types.Scene)):
+                if len(depsgraph.view_layer.objects) != self.count:
+                    return True
+        return False
+
+_panel_state = None
+
+def get_panel_state(context):
+    global _panel_state
+    if HAS_DEPSGRAPH:
+        key = context.view_layer.as_pointer()
+        if _panel_state is None or _panel_state.key != key:
+            _panel_state = PanelState(context.view_layer.objects, key)
+        return _panel_state
+
+    # Blender 2.79 has no depsgraph updates to know when it's stale
+    return PanelState(context.scene.objects, None)
+
+def mark_panel_state_dirty():
+    global _panel_state
+    _panel_state = None
+
+def is_beveled_curve(obj):
+    return bool(obj) and obj.type == 'CURVE' and bool(obj.data.bevel_object)
+
+def is_bevel_object(context, obj):
+    return bool(obj) and obj.as_pointer() in get_panel_state(context).bevel_objects
+
+@persistent
+def panel_state_update(*args):
+    mark_panel_state_dirty()
+
+@persistent
+def panel_state_depsgraph_update(scene, depsgraph=None):
+    if _panel_state is None:
+        return
+    if depsgraph is None or depsgraph.view_layer.as_pointer() != _panel_state.key or _panel_state.is_stale(depsgraph):
+        mark_panel_state_dirty()
+
+def get_world_bounds(obj):
+    """ World space axis aligned bounds of object as (min, max) """
+    corners = np.array([tuple(c) for c in obj.bound_box], dtype=np.float64)
+    mat = np.array(obj.matrix_world, dtype=np.float64)
+    corners = np.dot(corners, mat[:3, :3].T) + mat[:3, 3]
+    return corners.min(axis=0), corners.max(axis=0)
+
+def box_distance(point, bmin, bmax):
+    """ Distance from point to axis aligned box, zero inside """
+    return float(np.linalg.norm(np.maximum(np.maximum(bmin - point, 0.0), point - bmax)))
+
+class SpatialIndex:
+    """ Uniform grid over world bounds of beveled curves, keyed by object pointer.
+    Depsgraph updates move objects between cells, deleted objects are dropped when a query meets them """
+
+    def __init__(self, key, cell_size=1.0):
+        self.key = key
+        self.cell_size = cell_size
+        self.bounds = dict()
+        self.names = dict()
+        self.cells = dict()
+        self.object_cells = dict()
+        # Objects too big for the grid
+        self.large = set()
+        self.lo = None
+        self.hi = None
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def cell_of(self, co):
+        return tuple(int(math.floor(c / self.cell_size)) for c in co)
+
+    def cell_keys(self, lo, hi):
+        return [(i, j, k) for i in range(lo[0], hi[0] + 1)
+                for j in range(lo[1], hi[1] + 1)
+                for k in range(lo[2], hi[2] + 1)]
+
+    def cell_count(self, lo, hi):
+        return (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1)
+
+    def insert(self, pointer, name, bmin, bmax):
+        self.remove(pointer)
+        self.bounds[pointer] = (bmin, bmax)
+        self.names[pointer] = name
+
+        lo = self.cell_of(bmin)
+        hi = self.cell_of(bmax)
+        if self.cell_count(lo, hi) > SPATIAL_MAX_OBJECT_CELLS:
+            self.large.add(pointer)
+            return
+
+        keys = self.cell_keys(lo, hi)
+        for key in keys:
+            self.cells.setdefault(key, set()).add(pointer)
+        self.object_cells[pointer] = keys
+
+        if self.lo is None:
+            self.lo, self.hi = lo, hi
+        else:
+            self.lo = tuple(min(a, b) for a, b in zip(self.lo, lo))
+            self.hi = tuple(max(a, b) for a, b in zip(self.hi, hi))
+
+    def remove(self, pointer):
+        if pointer not in self.bounds:
+            return
+        del self.bounds[pointer]
+        del self.names[pointer]
+        self.large.discard(pointer)
+        for key in self.object_cells.pop(pointer, ()):
+            cell = self.cells[key]
+            cell.discard(pointer)
+            if not cell: del self.cells[key]
+
+    def update_object(self, obj, evaluated=None):
+        """ Insert, move or remove object, bounds come from its evaluated version if given """
+        pointer = obj.as_pointer()
+        if not is_beveled_curve(obj):
+            self.remove(pointer)
+            return
+        bmin, bmax = get_world_bounds(evaluated or obj)
+        old = self.bounds.get(pointer)
+        if old and np.array_equal(old[0], bmin) and np.array_equal(old[1], bmax):
+            self.names[pointer] = obj.name
+            return
+        self.insert(pointer, obj.name, bmin, bmax)
+
+    def resolve(self, objects, pointer):
+        """ Object of pointer in objects, forget it if it's gone or not beveled anymore """
+        obj = objects.get(self.names[pointer])
+        if obj is None or obj.as_pointer() != pointer or not is_beveled_curve(obj):
+            self.remove(pointer)
+            return None
+        return obj
+
+    def candidates(self, lo, hi):
+        found = set(self.large)
+        if self.cell_count(lo, hi) > len(self.cells):
+            # Query covers more cells than there are filled ones
+            for key, cell in self.cells.items():
+                if all(lo[i] <= key[i] <= hi[i] for i in range(3)):
+                    found.update(cell)
+            return found
+        for key in self.cell_keys(lo, hi):
+            cell = self.cells.get(key)
+            if cell: found.update(cell)
+        return found
+
+    def query_box(self, objects, bmin, bmax, inside=False):
+        """ Objects whose bounds overlap the box, or are fully inside it """
+        bmin = np.asarray(bmin, dtype=np.float64)
+        bmax = np.asarray(bmax, dtype=np.float64)
+        result = []
+        for pointer in self.candidates(self.cell_of(bmin), self.cell_of(bmax)):
+            omin, omax = self.bounds[pointer]
+            if inside:
+                hit = np.all(omin >= bmin) and np.all(omax <= bmax)
+            else: hit = np.all(omin <= bmax) and np.all(omax >= bmin)
+            if hit:
+                obj = self.resolve(objects, pointer)
+                if obj: result.append(obj)
+        return sorted(result, key=lambda o: o.name)
+
+    def overlapping(self, objects, obj):
+        """ Other objects whose bounds overlap bounds of obj """
+        bounds = self.bounds.get(obj.as_pointer())
+        if bounds is None:
+            return []
+        return [o for o in self.query_box(objects, *bounds) if o != obj]
+
+    def ring_keys(self, center, r):
+        """ Cells at chebyshev distance r from center cell """
+        keys = []
+        for i in range(-r, r + 1):
+            for j in range(-r, r + 1):
+                if abs(i) == r or abs(j) == r:
+                    ks = range(-r, r + 1)
+                else: ks = (-r, r) if r else (0,)
+                for k in ks:
+                    keys.append((center[0] + i, center[1] + j, center[2] + k))
+        return keys
+
+    def nearest(self, objects, point, exclude=()):
+        """ Object with bounds nearest to point and the distance, (None, inf) if there is none """
+        point = np.asarray(point, dtype=np.float64)
+        exclude = {o.as_pointer() for o in exclude}
+        best = None
+        best_dist = float('inf')
+        seen = set()
+
+        def test(pointers):
+            nonlocal best, best_dist
+            for pointer in pointers:
+                if pointer in seen or pointer in exclude: continue
+                seen.add(pointer)
+                dist = box_distance(point, *self.bounds[pointer])
+                if dist < best_dist and self.resolve(objects, pointer):
+                    best, best_dist = pointer, dist
+
+        test(list(self.large))
+
+        if self.cells:
+            center = self.cell_of(point)
+            # Rings needed to reach every filled cell
+            max_ring = max(max(center[i] - self.lo[i], self.hi[i] - center[i]) for i in range(3))
+            for r in range(max(max_ring, 0) + 1):
+                # Anything in ring r or further is at least (r - 1) cells away
+                if best_dist <= (r - 1) * self.cell_size:
+                    break
+                if (2 * r + 1) ** 3 > 8 * len(self.cells):
+                    # Rings got bigger than the filled grid, check the rest at once
+                    for key, cell in list(self.cells.items()):
+                        if max(abs(key[i] - center[i]) for i in range(3)) >= r:
+                            test(list(cell))
+                    break
+                for key in self.ring_keys(center, r):
+                    cell = self.cells.get(key)
+                    if cell: test(list(cell))
+
+        if best is None:
+            return None, best_dist
+        return objects.get(self.names[best]), best_dist
+
+def build_spatial_index(objects, key, evaluate=None):
+    """ Spatial index of beveled curves in objects, cell size fits typical curve size """
+    entries = []
+    for o in objects:
+        if is_beveled_curve(o):
+            bmin, bmax = get_world_bounds(evaluate(o) if evaluate else o)
+            entries.append((o.as_pointer(), o.name, bmin, bmax))
+
+    cell_size = 1.0
+    if entries:
+        sizes = [np.max(bmax - bmin) for _, _, bmin, bmax in entries]
+        cell_size = max(float(np.median(sizes)), 0.001)
+
+    index = SpatialIndex(key, cell_size)
+    for entry in entries:
+        index.insert(*entry)
+    return index
+
+_spatial_index = None
+
+def get_spatial_index(context):
+    global _spatial_index
+    if HAS_DEPSGRAPH:
+        key = context.view_layer.as_pointer()
+        if _spatial_index is None or _spatial_index.key != key:
+            depsgraph = context.evaluated_depsgraph_get()
+            _spatial_index = build_spatial_index(context.view_layer.objects, key,
+                    lambda o: o.evaluated_get(depsgraph))
+        return _spatial_index
+
+    # Blender 2.79 has no depsgraph updates to keep it current
+    return build_spatial_index(context.scene.objects, None)
+
+def mark_spatial_index_dirty():
+    global _spatial_index
+    _spatial_index = None
+
+@persistent
+def spatial_index_depsgraph_update(scene, depsgraph=None):
+    if _spatial_index is None or depsgraph is None:
+        return
+    if depsgraph.view_layer.as_pointer() != _spatial_index.key:
+        return
+    for update in depsgraph.updates:
+        evaluated = update.id
+        if isinstance(evaluated, bpy.types.Object) and evaluated.type == 'CURVE':
+            _spatial_index.update_object(evaluated.original, evaluated)
+
+@persistent
+def spatial_index_reset(*args):
+    mark_spatial_index_dirty()
+
+def select_objects_only(context, objs, extend=False):
+    """ Select objs and make the first one active """
+    if not extend:
+        for o in context.selected_objects:
+            set_object_select(o, False)
+    for o in objs:
+        set_object_select(o, True)
+    if objs:
+        set_active_object(objs[0])
+
 def main_draw(self, context):
     obj = context.active_object
     col = self.layout.column()
@@ -372,9 +3497,20 @@ def main_draw(self, context):
         c = col.column(align=True)
         c.operator("curve.y_add_bevel_to_curve", icon='MESH_DATA')
         c.operator("curve.y_edit_bevel_curve", icon='EDITMODE_HLT')
-        if is_greater_than_280():
-            c.operator("curve.y_hide_bevel_objects", icon='HIDE_ON')
-        else: c.operator("curve.y_hide_bevel_objects", icon='VISIBLE_IPO_OFF')
+        c.operator("curve.y_hide_bevel_objects", icon=HIDE_ICON)
+        c.operator("curve.y_simplify_curves", icon='MOD_DECIM')
+        r = c.row(align=True)
+        r.operator("curve.y_save_bevel_profile", text="Save Profile")
+        r.operator("curve.y_remove_bevel_profile", text="Remove Profile")
+
+        col.label(text="Falloff:")
+        c = col.column(align=True)
+        c.operator("curve.y_apply_radius_falloff", icon='SMOOTHCURVE')
+        # Drawing can't add data, the curve node comes from its own operator
+        node = get_falloff_curve_node()
+        if node:
+            c.template_curve_mapping(node, "mapping")
+        else: c.operator("curve.y_create_falloff_curve", icon='FCURVE')
 
         #if obj and obj.type =='CURVE':
         col.label(text="Convert:")
@@ -383,16 +3519,92 @@ def main_draw(self, context):
         c.operator("curve.y_convert_beveled_curve_to_separated_meshes", icon='OBJECT_DATA')
         c.operator("curve.y_convert_beveled_curve_to_merged_mesh", icon='OBJECT_DATA')
         c.operator("curve.y_convert_beveled_curve_to_union_mesh", icon='OBJECT_DATA')
+        c.operator("curve.y_convert_beveled_curve_to_lod_meshes", icon='OBJECT_DATA')
+        settings = context.scene.bevel_curve_tools
+        col.prop(settings, "threads")
+
+        col.label(text="Select:")
+        c = col.column(align=True)
+        c.operator("curve.y_select_beveled_curves_in_region", icon='BORDERMOVE')
+        c.operator("curve.y_select_overlapping_beveled_curves", icon=SELECT_OVERLAPPING_ICON)
+        c.operator("curve.y_select_nearest_beveled_curve", icon=SELECT_NEAREST_ICON)
+        c = col.column(align=True)
+        c.prop(settings, "use_mesh_cache")
+        if settings.use_mesh_cache:
+            c.prop(settings, "strip_cached_meshes")
+            c.operator("curve.y_clear_mesh_cache")
 
         if obj and obj.type == 'CURVE':
             col.label(text="Properties:")
             col.prop(obj.data, "resolution_u")
 
+        col.label(text="Viewport:")
+        c = col.column(align=True)
+        c.prop(settings, "use_proxy")
+        if settings.use_proxy:
+            c.prop(settings, "proxy_resolution")
+            c.prop(settings, "proxy_profile_points")
+
     elif context.mode =='EDIT_CURVE':
         col.alert = True
         col.operator("curve.y_finish_edit_bevel")
         col.alert = False
 
+class YBevelCurveToolsSettings(bpy.types.PropertyGroup):
+    use_proxy : BoolProperty(
+            name="Proxy Mode",
+            description="Show beveled curves with reduced resolution and simplified bevel profiles in the viewport.\nFull resolution is used for render and conversion",
+            default=False,
+            update=update_proxy_mode,
+            )
+
+    proxy_resolution : IntProperty(
+            name="Proxy Resolution",
+            description="Resolution of beveled curves while proxy mode is on",
+            min=1, max=64,
+            default=2,
+            update=update_proxy_mode,
+            )
+
+    proxy_profile_points : IntProperty(
+            name="Proxy Profile Points",
+            description="Maximum number of bevel profile points while proxy mode is on",
+            min=3, max=64,
+            default=4,
+            update=update_proxy_mode,
+            )
+
+    edit_bevel_owner : PointerProperty(
+            name="Edited Bevel Owner",
+            description="Curve whose bevel object is being edited",
+            type=bpy.types.Object,
+            )
+
+    edit_bevel_object : PointerProperty(
+            name="Edited Bevel Object",
+            description="Bevel object shown for editing, the other bevel objects stay hidden",
+            type=bpy.types.Object,
+            )
+
+    use_mesh_cache : BoolProperty(
+            name="Mesh Cache",
+            description="Bake converted meshes into a cache file beside the blend file.\nConverting the same curves again reads the cache instead",
+            default=False,
+            )
+
+    strip_cached_meshes : BoolProperty(
+            name="Save Without Baked Meshes",
+            description="Save baked meshes without geometry to keep the blend file small.\nGeometry is filled back from the cache file when loading",
+            default=False,
+            )
+
+    threads : IntProperty(
+            name="Threads",
+            description="Number of threads welding and sweeping mesh data in merged and LOD conversions, 0 uses all cores.\nOther conversions go through Blender's own convert on one thread",
+            min=0, max=64,
+            default=0,
+            )
+
 class YBevelCurveToolPanel(bpy.types.Panel):
     bl_space_type = "VIEW_3D"
     bl_region_type = "TOOLS"
@@ -425,26 +3637,25 @@ class YFinishEditBevel(bpy.types.Operator):
     def execute(self, context):
         bpy.ops.object.editmode_toggle()
         
+        settings = context.scene.bevel_curve_tools
         bevel_obj = context.active_object
-        
-        # Hide bevel object
-        hide_object(bevel_obj, True)
+        owner = settings.edit_bevel_owner
 
-        if is_greater_than_280():
-            # Hide collection
-            col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
-            if col: col.exclude = True
-        else:
-            # Bring back bevel object to layer 19
-            bevel_obj.layers[19] = True
-            for i in range(19):
-                bevel_obj.layers[i] = False
+        # Bevel object went to edit mode without edit bevel operator, its owner is recorded on it
+        if settings.edit_bevel_object != bevel_obj:
+            owner = get_bevel_owner(bevel_obj)
+            if owner: settings.edit_bevel_object = bevel_obj
+
+        # Hide bevel object
+        hide_bevel_objects(context)
 
         # Select curve object back
-        for obj in get_scene_objects():
-            if obj.type == 'CURVE' and obj.data.bevel_object and obj.data.bevel_object == bevel_obj:
-                set_object_select(obj, True)
-                set_active_object(obj)
+        if owner:
+            set_object_select(owner, True)
+            set_active_object(owner)
+
+            # Edited profile goes back to proxy
+            refresh_proxy(context.scene, [owner])
 
         return {'FINISHED'}
 
@@ -472,10 +3683,17 @@ class YNewBeveledCurve(bpy.types.Operator):
                 ('HALFCIRCLE', "Half-Circle", ""),
                 ('CIRCLE', "Circle", ""),
                 ('TRIANGLE', "Triangle", ""),
+                ('CUSTOM', "Custom", "Use saved profile from the profile library"),
                 ), 
             default='TRIANGLE',
             )
 
+    custom_profile : EnumProperty(
+            name = "Profile",
+            description="Saved bevel profile",
+            items=custom_profile_items,
+            )
+
     subsurf : BoolProperty(
             name="Use SubSurf Modifier",
             default=False,
@@ -537,13 +3755,20 @@ class YNewBeveledCurve(bpy.types.Operator):
             bpy.ops.curve.primitive_bezier_curve_add(radius = self.radius)
         else: bpy.ops.curve.primitive_nurbs_curve_add(radius = self.radius)
 
-        bpy.ops.curve.y_add_bevel_to_curve(
+        # Call the function directly so the whole thing is one undo step
+        error = add_bevel_to_curve(context, context.active_object,
+            shape = self.shape,
             scale_x = self.scale_x,
             scale_y = self.scale_y,
             rotation = self.rotation,
-            shape = self.shape,
             falloff = self.falloff,
-            subsurf = self.subsurf)
+            subsurf = self.subsurf,
+            custom_profile = self.custom_profile)
+
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
         return {'FINISHED'}
 
 class YConvertCurveToSeparatedMesh(bpy.types.Operator):
@@ -555,8 +3780,7 @@ class YConvertCurveToSeparatedMesh(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         # check if curve is selected
-        obj = bpy.context.active_object
-        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE' and obj.data.bevel_object
+        return context.mode == 'OBJECT' and is_beveled_curve(context.active_object)
 
     def execute(self, context):
         convert_curve_to_mesh(context, 'SEPARATE')
@@ -571,8 +3795,7 @@ class YConvertCurveToMergedMesh(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         # check if curve is selected
-        obj = bpy.context.active_object
-        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE' and obj.data.bevel_object
+        return context.mode == 'OBJECT' and is_beveled_curve(context.active_object)
 
     def execute(self, context):
         convert_curve_to_mesh(context, 'MERGE')
@@ -587,8 +3810,7 @@ class YConvertCurveToUnionMesh(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         # check if curve is selected
-        obj = bpy.context.active_object
-        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE' and obj.data.bevel_object
+        return context.mode == 'OBJECT' and is_beveled_curve(context.active_object)
 
     def execute(self, context):
         convert_curve_to_mesh(context, 'UNION')
@@ -603,13 +3825,153 @@ class YConvertCurveToMesh(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         # check if curve is selected
-        obj = bpy.context.active_object
-        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE' and obj.data.bevel_object
+        return context.mode == 'OBJECT' and is_beveled_curve(context.active_object)
 
     def execute(self, context):
         convert_curve_to_mesh(context, 'NOMERGE')
         return {'FINISHED'}
 
+class YConvertCurveToLODMeshes(bpy.types.Operator):
+    bl_idname = "curve.y_convert_beveled_curve_to_lod_meshes"
+    bl_label = "To LOD Meshes"
+    bl_description = "Convert beveled curve to several level of detail meshes in one pass"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    lod_count : IntProperty(
+            name="LOD Count",
+            description="Number of levels of detail to create",
+            min=1, max=8,
+            default=4,
+            )
+
+    ring_reduction : FloatProperty(
+            name="Ring Reduction",
+            description="Amount of rings along the curve kept on each next level",
+            min=0.05, max=1.0,
+            default=0.5,
+            precision=2
+            )
+
+    profile_reduction : FloatProperty(
+            name="Profile Reduction",
+            description="Amount of bevel profile points kept on each next level",
+            min=0.05, max=1.0,
+            default=0.75,
+            precision=2
+            )
+
+    @classmethod
+    def poll(cls, context):
+        # check if curve is selected
+        return context.mode == 'OBJECT' and is_beveled_curve(context.active_object)
+
+    def execute(self, context):
+        new_objs, skipped = convert_curve_to_lod_meshes(context,
+                self.lod_count, self.ring_reduction, self.profile_reduction)
+        if skipped:
+            self.report({'WARNING'} if new_objs else {'ERROR'}, "Not converted: " + "; ".join(skipped))
+        if not new_objs:
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+class YSelectBeveledCurvesInRegion(bpy.types.Operator):
+    bl_idname = "curve.y_select_beveled_curves_in_region"
+    bl_label = "Select In Region"
+    bl_description = "Select beveled curves inside bounds of active object, so only they get converted"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode : EnumProperty(
+            name = "Mode",
+            description="Which curves count as in region",
+            items=(
+                ('OVERLAP', "Overlap", "Select curves touching the region"),
+                ('INSIDE', "Inside", "Select curves fully inside the region"),
+                ),
+            default='OVERLAP',
+            )
+
+    extend : BoolProperty(
+            name="Extend",
+            description="Keep current selection",
+            default=False,
+            )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and context.active_object
+
+    def execute(self, context):
+        region = context.active_object
+        bmin, bmax = get_world_bounds(get_evaluated_object(context, region))
+        objs = get_spatial_index(context).query_box(get_scene_objects(), bmin, bmax, self.mode == 'INSIDE')
+        objs = [o for o in objs if o != region]
+
+        select_objects_only(context, objs, self.extend)
+        if objs and not self.extend:
+            set_object_select(region, False)
+
+        self.report({'INFO'}, "%d beveled curves in region" % len(objs))
+        return {'FINISHED'}
+
+class YSelectOverlappingBeveledCurves(bpy.types.Operator):
+    bl_idname = "curve.y_select_overlapping_beveled_curves"
+    bl_label = "Select Overlapping"
+    bl_description = "Add beveled curves overlapping the selected ones to selection, e.g. to convert them to one union mesh"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    connected : BoolProperty(
+            name="Connected",
+            description="Keep adding curves overlapping the added ones",
+            default=True,
+            )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and is_beveled_curve(context.active_object)
+
+    def execute(self, context):
+        index = get_spatial_index(context)
+        objects = get_scene_objects()
+        found = {o.as_pointer() : o for o in context.selected_objects if is_beveled_curve(o)}
+        queue = list(found.values())
+
+        while queue:
+            obj = queue.pop()
+            for o in index.overlapping(objects, obj):
+                if o.as_pointer() not in found:
+                    found[o.as_pointer()] = o
+                    if self.connected: queue.append(o)
+
+        for o in found.values():
+            set_object_select(o, True)
+
+        return {'FINISHED'}
+
+class YSelectNearestBeveledCurve(bpy.types.Operator):
+    bl_idname = "curve.y_select_nearest_beveled_curve"
+    bl_label = "Select Nearest To Cursor"
+    bl_description = "Select beveled curve nearest to 3D cursor"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    extend : BoolProperty(
+            name="Extend",
+            description="Keep current selection",
+            default=False,
+            )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        obj, dist = get_spatial_index(context).nearest(get_scene_objects(), get_cursor_location(context))
+        if not obj:
+            self.report({'ERROR'}, "No beveled curve found")
+            return {'CANCELLED'}
+
+        select_objects_only(context, [obj], self.extend)
+        return {'FINISHED'}
+
 class YHideBevelObjects(bpy.types.Operator):
     bl_idname = "curve.y_hide_bevel_objects"
     bl_label = "Hide Bevel Objects"
@@ -621,31 +3983,7 @@ class YHideBevelObjects(bpy.types.Operator):
         return context.mode == 'OBJECT'
 
     def execute(self, context):
-
-        bevel_objs = list()
-
-        if is_greater_than_280():
-            # Hide collection
-            col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
-            if col: col.exclude = True
-
-        for obj in get_scene_objects():
-            if obj.type == 'CURVE' and obj.data.bevel_object and obj.data.bevel_object not in bevel_objs:
-                bevel_objs.append(obj.data.bevel_object)
-            if '_bevel' in obj.name and  obj not in bevel_objs:
-                bevel_objs.append(obj)
-        
-        if not is_greater_than_280():
-            # Change object's layer to only layer 19
-            for obj in bevel_objs:
-                obj.layers[19] = True
-                for i in range(19):
-                    obj.layers[i] = False
-
-        # Hide objects
-        for obj in bevel_objs:
-            hide_object(obj, True)
-        
+        hide_bevel_objects(context)
         return {'FINISHED'}
 
 class YEditBevelCurve(bpy.types.Operator):
@@ -657,30 +3995,32 @@ class YEditBevelCurve(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         # Check if curve is selected
-        obj = context.active_object
-        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE' and obj.data.bevel_object
+        return context.mode == 'OBJECT' and is_beveled_curve(context.active_object)
 
     def execute(self, context):
 
         scn = context.scene
         obj = context.active_object
         curve = obj.data
+
+        # Edit the full bevel profile, not the proxy
+        restore_proxy([obj])
         bevel_obj = curve.bevel_object
 
         # Hide all bevel objects around first
-        bpy.ops.curve.y_hide_bevel_objects()
+        hide_bevel_objects(context)
 
         # Duplicate bevel object if it's used by other object
         bevel_used = check_bevel_used_by_other_objects(obj)
         if bevel_used:
             bevel_obj = bpy.data.objects.new(obj.name + '_bevel', bevel_obj.data.copy())
-
-            if is_greater_than_280():
-                col = get_set_collection(HIDDEN_COLLECTION_NAME, scn.collection)
-                col.objects.link(bevel_obj)
-            else: link_object(scn, bevel_obj)
+            link_new_bevel_object(scn, bevel_obj)
 
             curve.bevel_object = bevel_obj
+            mark_panel_state_dirty()
+
+        # Bevel objects made outside this add-on join the bevel collection too
+        store_bevel_object(context, bevel_obj, obj)
 
         idx = get_proper_index_bevel_placement(obj)
         bevel_rotation = get_point_rotation(context, scn, obj, index=idx[1], spline_index=idx[0])
@@ -691,17 +4031,8 @@ class YEditBevelCurve(bpy.types.Operator):
         bevel_obj.rotation_quaternion = bevel_rotation
         bevel_obj.location = bevel_position
 
-        if is_greater_than_280():
-            # Unhide collection
-            col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
-            if col: col.exclude = False
-        else:
-            # Show bevel object on active layer
-            for i in range(20):
-                bevel_obj.layers[i] = scn.layers[i]
-
-        # Show object if hidden
-        hide_object(bevel_obj, False)
+        # Show only this bevel object
+        show_bevel_object(context, obj, bevel_obj)
 
         bpy.ops.object.select_all(action='DESELECT')
         set_active_object(bevel_obj)
@@ -723,10 +4054,17 @@ class YAddBevelToCurve(bpy.types.Operator):
                 ('HALFCIRCLE', "Half-Circle", ""),
                 ('CIRCLE', "Circle", ""),
                 ('TRIANGLE', "Triangle", ""),
+                ('CUSTOM', "Custom", "Use saved profile from the profile library"),
                 ), 
             default='TRIANGLE',
             )
 
+    custom_profile : EnumProperty(
+            name = "Profile",
+            description="Saved bevel profile",
+            items=custom_profile_items,
+            )
+
     subsurf : BoolProperty(
             name="Use SubSurf Modifier",
             default=False,
@@ -769,14 +4107,47 @@ class YAddBevelToCurve(bpy.types.Operator):
             default='ONETIP',
             )
 
-    #falloff_power : FloatProperty(
-    #        name="Falloff Power",
-    #        description="Power of the falloff",
-    #        min=1.0, max=10.0,
-    #        default=1.0,
-    #        step=1.0,
-    #        precision=2
-    #        )
+    falloff_power : FloatProperty(
+            name="Falloff Power",
+            description="Power of the falloff",
+            min=1.0, max=10.0,
+            default=1.0,
+            step=1.0,
+            precision=2
+            )
+
+    simplify : BoolProperty(
+            name="Simplify Points",
+            description="Remove control points that barely change the curve before adding bevel",
+            default=False,
+            )
+
+    simplify_tolerance : FloatProperty(
+            name="Distance Tolerance",
+            description="Maximum distance between original and simplified curve.\nBezier splines are measured on the evaluated curve, other splines on their control points",
+            min=0.0, max=1.0,
+            default=0.001,
+            step=0.01,
+            precision=4,
+            subtype='DISTANCE',
+            )
+
+    simplify_radius_tolerance : FloatProperty(
+            name="Radius Tolerance",
+            description="Maximum radius change of removed points",
+            min=0.0, max=1.0,
+            default=0.01,
+            step=0.1,
+            precision=4,
+            )
+
+    simplify_tilt_tolerance : FloatProperty(
+            name="Tilt Tolerance",
+            description="Maximum tilt change of removed points",
+            min=0.0, max=math.pi,
+            default=math.radians(1.0),
+            subtype='ANGLE',
+            )
 
     #resolution : IntProperty(
     #        name="Resolution U",
@@ -792,244 +4163,366 @@ class YAddBevelToCurve(bpy.types.Operator):
             return False
         # check if curve is selected
         obj = context.active_object
-        if obj and obj.type == 'CURVE':
-            # Bevel object cannot use bevel too
-            bevel_match = any(o for o in get_scene_objects() if o.type == 'CURVE' and o.data.bevel_object == obj)
-            if bevel_match:
-                return False
-            else:
-                return True
-        return False
+        # Bevel object cannot use bevel too
+        return obj and obj.type == 'CURVE' and not is_bevel_object(context, obj)
 
     def execute(self, context):
+        if self.simplify:
+            curve = context.active_object.data
+            points_before = count_curve_points(curve)
+            rings_before = len(get_curve_evaluation(curve).samples)
 
-        curve_obj = context.active_object
-        scn = context.scene
-        curve = curve_obj.data
+        error = add_bevel_to_curve(context, context.active_object,
+            shape = self.shape,
+            scale_x = self.scale_x,
+            scale_y = self.scale_y,
+            rotation = self.rotation,
+            falloff = self.falloff,
+            subsurf = self.subsurf,
+            custom_profile = self.custom_profile,
+            falloff_power = self.falloff_power,
+            simplify = self.simplify,
+            simplify_tolerance = self.simplify_tolerance,
+            simplify_radius_tolerance = self.simplify_radius_tolerance,
+            simplify_tilt_tolerance = self.simplify_tilt_tolerance)
+
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        if self.simplify:
+            # Both estimates use the new bevel profile
+            curve = context.active_object.data
+            profile_points = count_profile_points(curve)
+            self.report({'INFO'}, format_reduction("Control points", points_before, count_curve_points(curve))
+                    + ", " + format_reduction("mesh vertices", rings_before * profile_points,
+                        estimate_mesh_vertices(curve, profile_points)))
 
-        # Set resolution
-        #curve.resolution_u = self.resolution
-        #curve.render_resolution_u = self.resolution
-        
-        # Blender 2.91+ need bevel mode to be set to object
-        if is_greater_than_291():
-            curve.bevel_mode = 'OBJECT'
+        return {'FINISHED'}
 
-        # First spline
-        splines = curve_obj.data.splines
-        points = get_spline_points(splines[0])
+class YApplyRadiusFalloff(bpy.types.Operator):
+    bl_idname = "curve.y_apply_radius_falloff"
+    bl_label = "Apply Radius Falloff"
+    bl_description = "Set point radius of selected curves from a falloff"
+    bl_options = {'REGISTER', 'UNDO'}
 
-        if len(points) < 2:
-            self.report({'ERROR'}, "Just one point wouldn't do it")
-            return {'CANCELLED'}  
-        
-        if len(points) == 2 and self.falloff == 'DUALTIP':
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.curve.select_all(action='SELECT')
-            bpy.ops.curve.subdivide() #number_cuts=3)
-            bpy.ops.object.editmode_toggle()
-            # spline data changes, so it must be retreived again
-            splines = curve_obj.data.splines
-            points = get_spline_points(splines[0])
-
-        # Spline setup
-        for spline in splines:
-            # Cardinal is better
-            spline.tilt_interpolation = 'CARDINAL'
-            spline.radius_interpolation = 'CARDINAL'
-
-            ps = get_spline_points(spline)
-
-            # Set tilt rotation
-            for p in ps:
-                p.tilt = self.rotation
-
-            #if spline.type == 'NURBS' or self.falloff == 'NOTIP':
-            if self.falloff == 'NOTIP':
-                radius_falloff(ps, tip='NO')
-
-            elif self.falloff == 'ONETIP':
-                radius_falloff(ps, tip='ONE')
-
-            elif self.falloff == 'DUALTIP':
-                radius_falloff(ps, tip='DUAL')
-
-        # Delete old bevel object if it's already there
-        if curve.bevel_object:
-
-            # Check if other object using this bevel object
-            bevel_used = check_bevel_used_by_other_objects(curve_obj)
-            
-            if not bevel_used:
-                if is_greater_than_280():
-                    col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
-                    if col: col.exclude = False
-
-                # Delete old bevel object
-                bevel_obj = curve.bevel_object
-                hide_object(bevel_obj, False)
-                bpy.ops.object.select_all(action='DESELECT')
-                set_object_select(bevel_obj, True)
-                set_active_object(bevel_obj)
-                bpy.ops.object.delete()
-
-                if is_greater_than_280():
-                    col = context.view_layer.layer_collection.children.get(HIDDEN_COLLECTION_NAME)
-                    if col: col.exclude = True
-
-                # Reselect curve_obj
-                set_object_select(curve_obj, True)
-                set_active_object(curve_obj)
-
-        # Point coords
-        triangle_coords = [
-                (-0.055, 0.0), (-0.06, 0.01),
-                (-0.005, 0.1), (0.005, 0.1),
-                (0.06, 0.01), (0.055, 0.0)]
-
-        halfcircle_coords = [
-                (-0.06, 0.0), (-0.06, 0.01),
-                (-0.045, 0.07), (0.0, 0.1), (0.045, 0.07),
-                (0.06, 0.01), (0.06, 0.0)]
-
-        circle_coords = [
-                (-0.036, 0.014), (-0.05, 0.05),
-                (-0.036, 0.086), (0.0, 0.1), (0.036, 0.086),
-                (0.05, 0.05), (0.036, 0.014)]
-
-        square_coords = [
-                (0.0, 0.04), (0.01, 0.05), 
-                (0.09, 0.05), (0.1, 0.04), 
-                (0.1, 0.0),
-                (0.1, -0.04), (0.09, -0.05), 
-                (0.01, -0.05), (0.0, -0.04)]
-
-        if self.shape == 'TRIANGLE':
-            coords = triangle_coords
-        elif self.shape == 'HALFCIRCLE':
-            coords = halfcircle_coords
-        elif self.shape == 'CIRCLE':
-            coords = circle_coords
-        elif self.shape == 'SQUARE':
-            coords = square_coords
-
-        # New object and curve data
-        bevel_curve = bpy.data.curves.new(curve_obj.name + '_bevel', 'CURVE')
-        bevel_curve.dimensions = '3D'
-        bevel_curve.resolution_u = 2
-        if not is_greater_than_280():
-            bevel_curve.show_normal_face = False
-
-        # Add new spline and set it's points to bevel curve
-        new_spline = bevel_curve.splines.new('POLY')
-        new_spline.use_cyclic_u = True
-        new_spline.points.add(len(coords))
-        for i, co in enumerate(coords):
-            new_spline.points[i].co = Vector((co[0], co[1], 0.0, 1.0))
-
-        # Create new bevel object
-        bevel_obj = bpy.data.objects.new(curve_obj.name + '_bevel', bevel_curve)
-        if not is_greater_than_280():
-            link_object(scn, bevel_obj)
-
-        # Add bevel to curve
-        curve.bevel_object = bevel_obj
-        curve.use_fill_caps = True
-        
-        # Scale the points
-        #for spline in bevel_curve.splines:
-        ps = get_spline_points(bevel_curve.splines[0])
-        sum_x = 0.0
-        sum_y = 0.0
-        for p in ps:
-            sum_x += p.co.x
-            sum_y += p.co.y
-
-        offset_x = sum_x / len(ps)
-        offset_y = sum_y / len(ps)
-
-        for p in ps:
-            # Offset to center the origins 
-            p.co.x -= offset_x
-            p.co.y -= offset_y
-
-            # then scale
-            p.co.x *= self.scale_x
-            p.co.y *= self.scale_y
-            
-        if self.falloff == 'DUALTIP':
-            midindex = int((len(points)-1)/2)
-            bevel_rotation = get_point_rotation(context, scn, curve_obj, index=midindex)
-            bevel_position = get_point_position(curve_obj, index=midindex)
-        else: 
-            bevel_rotation = get_point_rotation(context, scn, curve_obj)
-            bevel_position = get_point_position(curve_obj)
+    falloff : EnumProperty(
+            name = "Radius Falloff",
+            description="Falloff of beveled curve", 
+            items=(
+                ('DUALTIP', "Dual Tip", ""),
+                ('ONETIP', "One Tip", ""),
+                ('NOTIP', "No Tip", ""),
+                ('CURVE', "Curve", "Use falloff curve from the tool panel"),
+                ), 
+            default='ONETIP',
+            )
 
-        # Set object rotation and location
-        bevel_obj.rotation_mode = 'QUATERNION'
-        bevel_obj.rotation_quaternion = bevel_rotation
-        bevel_obj.location = bevel_position
+    falloff_power : FloatProperty(
+            name="Falloff Power",
+            description="Power of the falloff",
+            min=1.0, max=10.0,
+            default=1.0,
+            step=1.0,
+            precision=2
+            )
 
-        # Send bevel object to layer 20
-        if is_greater_than_280():
-            col = get_set_collection(HIDDEN_COLLECTION_NAME, scn.collection)
-            col.objects.link(bevel_obj)
-            context.view_layer.layer_collection.children[HIDDEN_COLLECTION_NAME].exclude = True
-        else:
-            bevel_obj.layers[19] = True
-            for i in range(19):
-                bevel_obj.layers[i] = False
-
-        # Hide bevel by default
-        hide_object(bevel_obj, True)
-
-        # Add/remove subsurf
-        subsurf_found = False
-        modifiers = curve_obj.modifiers
-        for m in modifiers:
-            if m.type == 'SUBSURF':
-                subsurf_found = True
-        
-        if self.subsurf == False:
-            if subsurf_found == True:
-                for m in modifiers:
-                    if m.type == 'SUBSURF':
-                        bpy.ops.object.modifier_remove(modifier=m.name)
+    use_arc_length : BoolProperty(
+            name="Use Length",
+            description="Spread falloff by distance along the points instead of point index",
+            default=True,
+            )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE'
+
+    def execute(self, context):
+
+        # Curve data can be shared between objects
+        curves = {o.data.as_pointer() : o.data for o in get_scene_objects()
+                if o.type == 'CURVE' and get_object_select(o)}
+
+        lut = get_falloff_lut() if self.falloff == 'CURVE' else None
+        count = apply_radius_falloff(list(curves.values()), FALLOFF_TIPS[self.falloff], self.falloff_power, self.use_arc_length, lut)
+
+        self.report({'INFO'}, "Radius of " + str(count) + " points changed")
+        return {'FINISHED'}
+
+class YCreateFalloffCurve(bpy.types.Operator):
+    bl_idname = "curve.y_create_falloff_curve"
+    bl_label = "Create Falloff Curve"
+    bl_description = "Create the custom falloff curve used by Curve falloff"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return get_falloff_curve_node() is None
+
+    def execute(self, context):
+        get_falloff_curve_node(create=True)
+        return {'FINISHED'}
 
-        if self.subsurf == True:
-            if subsurf_found == False:
-                bpy.ops.object.modifier_add(type='SUBSURF')
+class YSimplifyCurves(bpy.types.Operator):
+    bl_idname = "curve.y_simplify_curves"
+    bl_label = "Simplify Points"
+    bl_description = "Remove control points of selected curves that barely change their shape, radius and tilt"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    simplify_tolerance : FloatProperty(
+            name="Distance Tolerance",
+            description="Maximum distance between original and simplified curve.\nBezier splines are measured on the evaluated curve, other splines on their control points",
+            min=0.0, max=1.0,
+            default=0.001,
+            step=0.01,
+            precision=4,
+            subtype='DISTANCE',
+            )
+
+    simplify_radius_tolerance : FloatProperty(
+            name="Radius Tolerance",
+            description="Maximum radius change of removed points",
+            min=0.0, max=1.0,
+            default=0.01,
+            step=0.1,
+            precision=4,
+            )
+
+    simplify_tilt_tolerance : FloatProperty(
+            name="Tilt Tolerance",
+            description="Maximum tilt change of removed points",
+            min=0.0, max=math.pi,
+            default=math.radians(1.0),
+            subtype='ANGLE',
+            )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE'
+
+    def execute(self, context):
+
+        objs = [o for o in get_scene_objects() if o.type == 'CURVE' and get_object_select(o)]
+
+        # Work on full resolution
+        restore_proxy(objs)
+
+        # Curve data can be shared between objects
+        curves = {o.data.as_pointer() : o.data for o in objs}
+
+        points = [0, 0]
+        vertices = [0, 0]
+        skipped = list()
+        for curve in curves.values():
+            error = get_simplify_error(curve)
+            if error:
+                skipped.append(error)
+                continue
+
+            profile_points = count_profile_points(curve)
+            vertices[0] += estimate_mesh_vertices(curve, profile_points)
+            before, after = simplify_curve(curve, self.simplify_tolerance,
+                    self.simplify_radius_tolerance, self.simplify_tilt_tolerance)
+            points[0] += before
+            points[1] += after
+            vertices[1] += estimate_mesh_vertices(curve, profile_points)
+
+        refresh_proxy(context.scene, objs)
+
+        if skipped:
+            self.report({'WARNING'}, "Skipped: " + "; ".join(skipped))
+        self.report({'INFO'}, format_reduction("Control points", *points)
+                + ", " + format_reduction("mesh vertices", *vertices))
+        return {'FINISHED'}
+
+class YClearMeshCache(bpy.types.Operator):
+    bl_idname = "curve.y_clear_mesh_cache"
+    bl_label = "Clear Mesh Cache"
+    bl_description = "Delete mesh cache file of this blend file"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return bool(bpy.data.filepath)
+
+    def execute(self, context):
+        error = clear_mesh_cache()
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+class YSaveBevelProfile(bpy.types.Operator):
+    bl_idname = "curve.y_save_bevel_profile"
+    bl_label = "Save Bevel Profile"
+    bl_description = "Save bevel shape of active curve to the profile library, shared by all files"
+    bl_options = {'REGISTER'}
+
+    name : StringProperty(
+            name="Name",
+            description="Name of the saved profile",
+            default="Profile",
+            )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return context.mode == 'OBJECT' and obj and obj.type == 'CURVE' and obj.data.bevel_object
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        obj = context.active_object
+
+        # Save the full profile, not the proxy
+        restore_proxy([obj])
+        profile = get_bevel_profiles(obj.data)
+        refresh_proxy(context.scene, [obj])
+
+        if not profile:
+            self.report({'ERROR'}, "Bevel object has no profile to save")
+            return {'CANCELLED'}
+
+        name = self.name.strip()
+        if not name:
+            self.report({'ERROR'}, "Profile needs a name")
+            return {'CANCELLED'}
+
+        try:
+            save_user_profile(name, profile)
+        except OSError as e:
+            self.report({'ERROR'}, "Cannot write profile library: " + str(e))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, "Profile '" + name + "' saved")
+        return {'FINISHED'}
+
+class YRemoveBevelProfile(bpy.types.Operator):
+    bl_idname = "curve.y_remove_bevel_profile"
+    bl_label = "Remove Bevel Profile"
+    bl_description = "Remove saved profile from the profile library"
+    bl_options = {'REGISTER'}
+
+    custom_profile : EnumProperty(
+            name = "Profile",
+            description="Saved bevel profile",
+            items=custom_profile_items,
+            )
+
+    @classmethod
+    def poll(cls, context):
+        return len(get_profile_library()) > 0
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        try:
+            remove_user_profile(self.custom_profile)
+        except OSError as e:
+            self.report({'ERROR'}, "Cannot write profile library: " + str(e))
+            return {'CANCELLED'}
 
         return {'FINISHED'}
 
 def register():
 
-    if is_greater_than_280():
-        bpy.utils.register_class(VIEW3D_PT_YBevelCurveToolUIPanel)
-    else: bpy.utils.register_class(YBevelCurveToolPanel)
+    bpy.utils.register_class(YBevelCurveToolsSettings)
+    bpy.types.Scene.bevel_curve_tools = PointerProperty(type=YBevelCurveToolsSettings)
+
+    bpy.utils.register_class(get_tool_panel_class())
     bpy.utils.register_class(YFinishEditBevel)
     bpy.utils.register_class(YNewBeveledCurve)
     bpy.utils.register_class(YConvertCurveToSeparatedMesh)
     bpy.utils.register_class(YConvertCurveToMergedMesh)
     bpy.utils.register_class(YConvertCurveToUnionMesh)
     bpy.utils.register_class(YConvertCurveToMesh)
+    bpy.utils.register_class(YConvertCurveToLODMeshes)
     bpy.utils.register_class(YHideBevelObjects)
+    bpy.utils.register_class(YSelectBeveledCurvesInRegion)
+    bpy.utils.register_class(YSelectOverlappingBeveledCurves)
+    bpy.utils.register_class(YSelectNearestBeveledCurve)
     bpy.utils.register_class(YEditBevelCurve)
     bpy.utils.register_class(YAddBevelToCurve)
+    bpy.utils.register_class(YApplyRadiusFalloff)
+    bpy.utils.register_class(YCreateFalloffCurve)
+    bpy.utils.register_class(YSimplifyCurves)
+    bpy.utils.register_class(YClearMeshCache)
+    bpy.utils.register_class(YSaveBevelProfile)
+    bpy.utils.register_class(YRemoveBevelProfile)
+
+    bpy.app.handlers.render_pre.append(proxy_render_pre)
+    bpy.app.handlers.render_post.append(proxy_render_post)
+    bpy.app.handlers.render_cancel.append(proxy_render_post)
+    if HAS_DEPSGRAPH:
+        bpy.app.handlers.depsgraph_update_post.append(curve_cache_depsgraph_update)
+        bpy.app.handlers.undo_post.append(curve_cache_reset)
+        bpy.app.handlers.redo_post.append(curve_cache_reset)
+        bpy.app.handlers.depsgraph_update_post.append(panel_state_depsgraph_update)
+        bpy.app.handlers.undo_post.append(panel_state_update)
+        bpy.app.handlers.redo_post.append(panel_state_update)
+        bpy.app.handlers.depsgraph_update_post.append(spatial_index_depsgraph_update)
+        bpy.app.handlers.undo_post.append(spatial_index_reset)
+        bpy.app.handlers.redo_post.append(spatial_index_reset)
+        bpy.app.handlers.load_post.append(spatial_index_reset)
+    bpy.app.handlers.load_post.append(curve_cache_reset)
+    bpy.app.handlers.load_post.append(panel_state_update)
+    bpy.app.handlers.load_post.append(mesh_cache_load_post)
+    bpy.app.handlers.load_post.append(bevel_objects_load_post)
+    bpy.app.handlers.save_pre.append(mesh_cache_save_pre)
+    bpy.app.handlers.save_post.append(mesh_cache_save_post)
 
 def unregister():
-    if is_greater_than_280():
-        bpy.utils.unregister_class(VIEW3D_PT_YBevelCurveToolUIPanel)
-    else: bpy.utils.unregister_class(YBevelCurveToolPanel)
+    bpy.utils.unregister_class(get_tool_panel_class())
     bpy.utils.unregister_class(YFinishEditBevel)
     bpy.utils.unregister_class(YNewBeveledCurve)
     bpy.utils.unregister_class(YConvertCurveToSeparatedMesh)
     bpy.utils.unregister_class(YConvertCurveToMergedMesh)
     bpy.utils.unregister_class(YConvertCurveToUnionMesh)
     bpy.utils.unregister_class(YConvertCurveToMesh)
+    bpy.utils.unregister_class(YConvertCurveToLODMeshes)
     bpy.utils.unregister_class(YHideBevelObjects)
+    bpy.utils.unregister_class(YSelectBeveledCurvesInRegion)
+    bpy.utils.unregister_class(YSelectOverlappingBeveledCurves)
+    bpy.utils.unregister_class(YSelectNearestBeveledCurve)
     bpy.utils.unregister_class(YEditBevelCurve)
     bpy.utils.unregister_class(YAddBevelToCurve)
+    bpy.utils.unregister_class(YApplyRadiusFalloff)
+    bpy.utils.unregister_class(YCreateFalloffCurve)
+    bpy.utils.unregister_class(YSimplifyCurves)
+    bpy.utils.unregister_class(YClearMeshCache)
+    bpy.utils.unregister_class(YSaveBevelProfile)
+    bpy.utils.unregister_class(YRemoveBevelProfile)
+
+    bpy.app.handlers.render_pre.remove(proxy_render_pre)
+    bpy.app.handlers.render_post.remove(proxy_render_post)
+    bpy.app.handlers.render_cancel.remove(proxy_render_post)
+    if HAS_DEPSGRAPH:
+        bpy.app.handlers.depsgraph_update_post.remove(curve_cache_depsgraph_update)
+        bpy.app.handlers.undo_post.remove(curve_cache_reset)
+        bpy.app.handlers.redo_post.remove(curve_cache_reset)
+        bpy.app.handlers.depsgraph_update_post.remove(panel_state_depsgraph_update)
+        bpy.app.handlers.undo_post.remove(panel_state_update)
+        bpy.app.handlers.redo_post.remove(panel_state_update)
+        bpy.app.handlers.depsgraph_update_post.remove(spatial_index_depsgraph_update)
+        bpy.app.handlers.undo_post.remove(spatial_index_reset)
+        bpy.app.handlers.redo_post.remove(spatial_index_reset)
+        bpy.app.handlers.load_post.remove(spatial_index_reset)
+    bpy.app.handlers.load_post.remove(curve_cache_reset)
+    bpy.app.handlers.load_post.remove(panel_state_update)
+    bpy.app.handlers.load_post.remove(mesh_cache_load_post)
+    bpy.app.handlers.load_post.remove(bevel_objects_load_post)
+    bpy.app.handlers.save_pre.remove(mesh_cache_save_pre)
+    bpy.app.handlers.save_post.remove(mesh_cache_save_post)
+    mark_panel_state_dirty()
+    mark_spatial_index_dirty()
+    invalidate_curve_evaluation()
+
+    del bpy.types.Scene.bevel_curve_tools
+    bpy.utils.unregister_class(YBevelCurveToolsSettings)
 
 if __name__ == "__main__":
     register()
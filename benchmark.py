@@ -0,0 +1,395 @@
+"""
+Benchmark harness for Bevel Curve Tools, it runs inside Blender:
+
+    blender --background --factory-startup --python benchmark.py -- --curves 200
+
+Run it on two commits and compare the outputs to see the gain of a change.
+Benchmarks of operators or settings a commit doesn't have are reported as
+n/a, so this file can be copied next to an older __init__.py.
+
+Measured operators are called like from the UI, each call pushes an undo
+step. Peak memory is how far resident memory of Blender rose above where it
+started during the benchmark. Undo memory is the growth of Blender's undo
+stack, the same number the status bar shows.
+
+Results are printed and written to bench_output.txt by default.
+"""
+
+import bpy, os, sys, time, random, argparse, tempfile, importlib.util
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_NAME = 'bevel_curve_tools'
+
+BENCHMARKS = []
+
+def benchmark(name):
+    def wrap(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return wrap
+
+def load_addon():
+    spec = importlib.util.spec_from_file_location(ADDON_NAME, os.path.join(ADDON_DIR, '__init__.py'),
+            submodule_search_locations=[ADDON_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_NAME] = module
+    spec.loader.exec_module(module)
+    module.register()
+    return module
+
+def has_operator(op):
+    """ Operators of newer commits are missing when benchmarking older ones """
+    try:
+        op.get_rna_type()
+        return True
+    except KeyError:
+        return False
+
+def run_op(op, **props):
+    """ Call operator with an undo push, like a click in the UI """
+    return op('EXEC_DEFAULT', True, **props)
+
+# Enough undo steps to keep every step of one benchmark, older ones would be freed
+UNDO_STEPS = 256
+
+def reset_undo():
+    """ Start the undo stack over with one step, so a benchmark only sees its own steps """
+    edit = bpy.context.preferences.edit
+    edit.undo_steps = 1
+    bpy.ops.ed.undo_push(message="Benchmark")
+    edit.undo_steps = UNDO_STEPS
+
+def undo_memory_kb():
+    """ Memory held by the undo stack, None on Blender versions that can't tell """
+    if hasattr(bpy.app, 'memory_usage_undo'):
+        return bpy.app.memory_usage_undo() // 1024
+    return None
+
+def current_rss_kb():
+    """ Resident memory of this process, used to see undo memory growth """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def peak_rss_kb():
+    """ Highest resident memory of this process, since the last reset_peak_rss on Linux """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reports bytes
+        return peak // 1024 if sys.platform == 'darwin' else peak
+    except ImportError:
+        return 0
+
+def reset_peak_rss():
+    """ Start peak_rss_kb over from current resident memory, False where the system can't """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def reset_scene():
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for datablocks in (bpy.data.objects, bpy.data.curves, bpy.data.meshes):
+        for block in list(datablocks):
+            datablocks.remove(block)
+    for col in list(bpy.data.collections):
+        bpy.data.collections.remove(col)
+
+def make_beveled_curves(count, curve_type='BEZIER', shape='TRIANGLE', falloff='ONETIP', spacing=0.5):
+    """ Grid of beveled curves made with the add-on operator """
+    side = max(int(count ** 0.5), 1)
+    objs = []
+    for i in range(count):
+        bpy.ops.curve.y_new_beveled_curve(curve_type=curve_type, shape=shape, falloff=falloff)
+        obj = bpy.context.active_object
+        obj.location = ((i % side) * spacing * 4.0, (i // side) * spacing, 0.0)
+        objs.append(obj)
+    return objs
+
+def select_objects(objs):
+    bpy.ops.object.select_all(action='DESELECT')
+    for o in objs:
+        o.select_set(True)
+    bpy.context.view_layer.objects.active = objs[0]
+
+def measure(func):
+    """ Returns (seconds, peak process memory growth, undo memory growth or None), memory in KB.
+    Without a resettable peak, process memory growth at the end is used instead """
+    reset_undo()
+    rss = current_rss_kb()
+    has_peak = reset_peak_rss()
+    undo = undo_memory_kb()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    memory = peak_rss_kb() if has_peak else current_rss_kb()
+    if undo is not None:
+        undo = undo_memory_kb() - undo
+    return elapsed, memory - rss, undo
+
+def measure_average(func, calls):
+    """ measure with time of one call out of calls """
+    elapsed, memory, undo = measure(func)
+    return elapsed / calls, memory, undo
+
+@benchmark('new_beveled_curve')
+def bench_new_beveled_curve(args):
+    def run():
+        for i in range(args.curves):
+            run_op(bpy.ops.curve.y_new_beveled_curve, falloff='DUALTIP')
+
+    return measure(run)
+
+@benchmark('add_bevel')
+def bench_add_bevel(args):
+    objs = make_beveled_curves(args.curves)
+
+    def run():
+        for o in objs:
+            bpy.context.view_layer.objects.active = o
+            run_op(bpy.ops.curve.y_add_bevel_to_curve, shape='CIRCLE', falloff='DUALTIP', subsurf=True)
+
+    return measure(run)
+
+@benchmark('edit_bevel')
+def bench_edit_bevel(args):
+    objs = make_beveled_curves(args.curves)
+
+    def run():
+        for o in objs:
+            select_objects([o])
+            run_op(bpy.ops.curve.y_edit_bevel_curve)
+            run_op(bpy.ops.curve.y_finish_edit_bevel)
+
+    return measure(run)
+
+@benchmark('radius_falloff')
+def bench_radius_falloff(args):
+    if not has_operator(bpy.ops.curve.y_apply_radius_falloff):
+        return None
+    objs = make_beveled_curves(args.curves)
+    select_objects(objs)
+    return measure(lambda: run_op(bpy.ops.curve.y_apply_radius_falloff, falloff='DUALTIP', falloff_power=2.0))
+
+@benchmark('hide_bevels')
+def bench_hide_bevels(args):
+    """ Time of one hide bevel objects call, averaged over many calls """
+    make_beveled_curves(args.curves)
+    calls = 100
+
+    def run():
+        for i in range(calls):
+            run_op(bpy.ops.curve.y_hide_bevel_objects)
+
+    return measure_average(run, calls)
+
+# Operators the panel polls on every redraw
+PANEL_OPERATORS = (
+    bpy.ops.curve.y_new_beveled_curve,
+    bpy.ops.curve.y_add_bevel_to_curve,
+    bpy.ops.curve.y_edit_bevel_curve,
+    bpy.ops.curve.y_hide_bevel_objects,
+    bpy.ops.curve.y_simplify_curves,
+    bpy.ops.curve.y_convert_beveled_curve_to_meshes,
+    bpy.ops.curve.y_convert_beveled_curve_to_separated_meshes,
+    bpy.ops.curve.y_convert_beveled_curve_to_merged_mesh,
+    bpy.ops.curve.y_convert_beveled_curve_to_union_mesh,
+    bpy.ops.curve.y_convert_beveled_curve_to_lod_meshes,
+    bpy.ops.curve.y_select_beveled_curves_in_region,
+    bpy.ops.curve.y_select_overlapping_beveled_curves,
+    bpy.ops.curve.y_select_nearest_beveled_curve,
+    )
+
+@benchmark('panel_redraw')
+def bench_panel_redraw(args):
+    """ Poll latency of one sidebar redraw, averaged over many redraws """
+    objs = make_beveled_curves(args.curves)
+    select_objects(objs[-1:])
+    redraws = 1000
+    # Older commits poll fewer operators, compare commits with the same set
+    operators = [op for op in PANEL_OPERATORS if has_operator(op)]
+
+    def run():
+        for i in range(redraws):
+            for op in operators:
+                op.poll()
+
+    return measure_average(run, redraws)
+
+def bench_convert(args, op):
+    if not has_operator(op):
+        return None
+    objs = make_beveled_curves(args.curves)
+    select_objects(objs)
+    return measure(lambda: run_op(op))
+
+@benchmark('convert_nomerge')
+def bench_convert_nomerge(args):
+    return bench_convert(args, bpy.ops.curve.y_convert_beveled_curve_to_meshes)
+
+@benchmark('convert_separate')
+def bench_convert_separate(args):
+    return bench_convert(args, bpy.ops.curve.y_convert_beveled_curve_to_separated_meshes)
+
+@benchmark('convert_merge')
+def bench_convert_merge(args):
+    return bench_convert(args, bpy.ops.curve.y_convert_beveled_curve_to_merged_mesh)
+
+@benchmark('convert_lod')
+def bench_convert_lod(args):
+    return bench_convert(args, bpy.ops.curve.y_convert_beveled_curve_to_lod_meshes)
+
+@benchmark('cache_reload')
+def bench_cache_reload(args):
+    """ Loading a file saved without baked mesh geometry, meshes come back from the mesh cache """
+    settings = getattr(bpy.context.scene, 'bevel_curve_tools', None)
+    if not hasattr(settings, 'use_mesh_cache'):
+        return None
+    settings.use_mesh_cache = True
+    settings.strip_cached_meshes = True
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'cache_reload.blend')
+    bpy.ops.wm.save_as_mainfile(filepath=filepath)
+    objs = make_beveled_curves(args.curves)
+    select_objects(objs)
+    bpy.ops.curve.y_convert_beveled_curve_to_meshes()
+    bpy.ops.wm.save_mainfile()
+
+    result = measure(lambda: bpy.ops.wm.open_mainfile(filepath=filepath))
+    bpy.ops.wm.read_homefile(use_empty=True)
+    return result
+
+def get_addon():
+    return sys.modules[ADDON_NAME]
+
+def random_boxes(objs, count, size):
+    """ Deterministic query boxes spread over the area of objs """
+    co = [tuple(o.location) for o in objs]
+    lo = [min(c[i] for c in co) for i in range(3)]
+    hi = [max(c[i] for c in co) for i in range(3)]
+    rng = random.Random(0)
+    boxes = []
+    for i in range(count):
+        center = [rng.uniform(lo[j] - size, hi[j] + size) for j in range(3)]
+        boxes.append(([c - size for c in center], [c + size for c in center]))
+    return boxes
+
+@benchmark('spatial_index_build')
+def bench_spatial_index_build(args):
+    addon = get_addon()
+    if not hasattr(addon, 'get_spatial_index'):
+        return None
+    make_beveled_curves(args.curves)
+    addon.mark_spatial_index_dirty()
+    return measure(lambda: addon.get_spatial_index(bpy.context))
+
+# Query benchmarks report time of one query, run them with several curve counts to see scaling
+QUERY_COUNT = 1000
+
+@benchmark('region_query')
+def bench_region_query(args):
+    addon = get_addon()
+    if not hasattr(addon, 'get_spatial_index'):
+        return None
+    objs = make_beveled_curves(args.curves)
+    index = addon.get_spatial_index(bpy.context)
+    objects = bpy.context.view_layer.objects
+    boxes = random_boxes(objs, QUERY_COUNT, 0.5)
+
+    def run():
+        for bmin, bmax in boxes:
+            index.query_box(objects, bmin, bmax)
+
+    return measure_average(run, QUERY_COUNT)
+
+@benchmark('region_scan')
+def bench_region_scan(args):
+    """ Same queries as region_query by going through every scene object """
+    addon = get_addon()
+    if not hasattr(addon, 'get_world_bounds'):
+        return None
+    objs = make_beveled_curves(args.curves)
+    boxes = random_boxes(objs, QUERY_COUNT // 10, 0.5)
+
+    def run():
+        for bmin, bmax in boxes:
+            for o in bpy.context.view_layer.objects:
+                if addon.is_beveled_curve(o):
+                    omin, omax = addon.get_world_bounds(o)
+                    all(omin <= bmax) and all(omax >= bmin)
+
+    return measure_average(run, len(boxes))
+
+@benchmark('nearest_query')
+def bench_nearest_query(args):
+    addon = get_addon()
+    if not hasattr(addon, 'get_spatial_index'):
+        return None
+    objs = make_beveled_curves(args.curves)
+    index = addon.get_spatial_index(bpy.context)
+    objects = bpy.context.view_layer.objects
+    points = [bmin for bmin, bmax in random_boxes(objs, QUERY_COUNT, 0.0)]
+
+    def run():
+        for co in points:
+            index.nearest(objects, co)
+
+    return measure_average(run, QUERY_COUNT)
+
+@benchmark('convert_union')
+def bench_convert_union(args):
+    # Boolean union is slow, keep the count small
+    args = argparse.Namespace(**vars(args))
+    args.curves = min(args.curves, 20)
+    return bench_convert(args, bpy.ops.curve.y_convert_beveled_curve_to_union_mesh)
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(description="Bevel Curve Tools benchmarks")
+    parser.add_argument('--curves', type=int, default=100, help="Number of curves per scene")
+    parser.add_argument('--threads', type=int, default=0, help="Conversion threads, 0 uses all cores")
+    parser.add_argument('--only', nargs='*', default=None, help="Names of benchmarks to run")
+    parser.add_argument('--output', default=os.path.join(ADDON_DIR, 'bench_output.txt'))
+    args = parser.parse_args(argv)
+
+    load_addon()
+    undo_steps = bpy.context.preferences.edit.undo_steps
+
+    lines = ['Blender %s, %d curves, %d threads' % (bpy.app.version_string, args.curves, args.threads),
+            '%-24s %12s %16s %16s' % ('benchmark', 'time (s)', 'peak mem (KB)', 'undo (KB)')]
+
+    for name, func in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        reset_scene()
+        settings = getattr(bpy.context.scene, 'bevel_curve_tools', None)
+        if hasattr(settings, 'threads'):
+            settings.threads = args.threads
+        result = func(args)
+        if result is None:
+            lines.append('%-24s %12s' % (name, 'n/a'))
+        else:
+            elapsed, memory, undo = result
+            lines.append('%-24s %12.4f %16d %16s' % (name, elapsed, memory, 'n/a' if undo is None else undo))
+        print(lines[-1])
+
+    bpy.context.preferences.edit.undo_steps = undo_steps
+
+    with open(args.output, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,514 @@
+"""
+Regression suite for Bevel Curve Tools, it runs inside Blender:
+
+    blender --background --factory-startup --python-exit-code 1 --python regression.py
+
+Every scenario builds beveled curves with one shape, falloff and curve type,
+converts them with one convert mode, then compares the result against the
+stored references in regression_goldens.npz: vertex and face counts, bounding
+box, volume, Hausdorff distance and bevel orientation. Time and peak memory of
+the conversion must also stay inside budgets derived from the references.
+
+Bevel rotations from the add-on frames are also checked against rotations
+read from a mesh Blender sweeps itself, simplified bezier curves must stay
+within tolerance of the original evaluated curve, and merged and LOD meshes
+must be byte for byte the same with one or several threads, these need no
+references. Reference
+rotations of nurbs curves aren't compared, the reference commit measured them
+from control points, which nurbs curves don't pass through.
+
+References come from a known good commit:
+
+    blender --background --factory-startup --python regression.py -- --update
+
+Scenarios a commit has no operator for are skipped while updating, so
+references can be made in two steps. The committed ones were made on the
+commit before the performance series, then LOD scenarios and falloffs applied
+with the radius falloff operator were added from a later commit, whose bevel
+orientation the rotation scenarios check against Blender's own sweep:
+
+    blender --background --factory-startup --python regression.py -- --update --only lod power curve length
+
+Results are printed and written to test_output.txt by default.
+"""
+
+import bpy, os, sys, json, math, time, argparse
+import numpy as np
+from mathutils import kdtree
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ADDON_DIR)
+
+from benchmark import load_addon, reset_scene, make_beveled_curves, select_objects, measure, has_operator
+
+GOLDENS_PATH = os.path.join(ADDON_DIR, 'regression_goldens.npz')
+
+SHAPES = ('SQUARE', 'HALFCIRCLE', 'CIRCLE', 'TRIANGLE')
+
+# Falloffs as (falloff of new beveled curves, settings of apply radius falloff after or None)
+FALLOFFS = {
+    'DUALTIP' : ('DUALTIP', None),
+    'ONETIP' : ('ONETIP', None),
+    'NOTIP' : ('NOTIP', None),
+    'POWER' : ('ONETIP', dict(falloff='ONETIP', falloff_power=3.0, use_arc_length=False)),
+    'CURVE' : ('ONETIP', dict(falloff='CURVE', use_arc_length=False)),
+    'LENGTH' : ('DUALTIP', dict(falloff='DUALTIP', falloff_power=2.0, use_arc_length=True)),
+    }
+
+CURVE_TYPES = ('BEZIER', 'NURBS')
+CONVERT_OPERATORS = (
+    ('NOMERGE', 'y_convert_beveled_curve_to_meshes'),
+    ('SEPARATE', 'y_convert_beveled_curve_to_separated_meshes'),
+    ('MERGE', 'y_convert_beveled_curve_to_merged_mesh'),
+    ('UNION', 'y_convert_beveled_curve_to_union_mesh'),
+    ('LOD', 'y_convert_beveled_curve_to_lod_meshes'),
+    )
+
+# Curves per scenario, close enough to overlap for union
+CURVE_COUNT = 3
+CURVE_SPACING = 0.3
+
+def scenarios():
+    for shape in SHAPES:
+        for falloff in FALLOFFS:
+            for curve_type in CURVE_TYPES:
+                for mode, op_name in CONVERT_OPERATORS:
+                    name = '-'.join((shape, falloff, curve_type, mode)).lower()
+                    yield name, mode, shape, falloff, curve_type, op_name
+
+def make_scenario_curves(count, curve_type, shape, falloff, spacing=0.5):
+    """ Beveled curves with one of FALLOFFS, None if this commit can't make them """
+    tip, settings = FALLOFFS[falloff]
+    if settings and not has_operator(bpy.ops.curve.y_apply_radius_falloff):
+        return None
+
+    objs = make_beveled_curves(count, curve_type, shape, tip, spacing)
+    if settings:
+        if settings['falloff'] == 'CURVE':
+            make_falloff_curve()
+        select_objects(objs)
+        bpy.ops.curve.y_apply_radius_falloff(**settings)
+    return objs
+
+def make_falloff_curve():
+    """ Custom falloff curve that bulges over the straight one tip falloff """
+    if bpy.ops.curve.y_create_falloff_curve.poll():
+        bpy.ops.curve.y_create_falloff_curve()
+    node = bpy.data.node_groups['.bevel_curve_tools_falloff'].nodes['Falloff']
+    points = node.mapping.curves[3].points
+    if len(points) == 2:
+        points.new(0.5, 0.8)
+        node.mapping.update()
+
+# Maximum angle in radians between add-on and Blender bevel rotations
+ROTATION_TOLERANCE = 1e-3
+
+# Curve types whose reference rotations are exact
+REFERENCE_ROTATION_TYPES = ('BEZIER',)
+
+def rotation_scenarios():
+    for curve_type in CURVE_TYPES:
+        for falloff in FALLOFFS:
+            yield '-'.join(('rotation', curve_type, falloff)).lower(), curve_type, falloff
+
+def run_rotation_scenario(addon, curve_type, falloff):
+    """ Biggest angle between add-on and Blender bevel rotations over control points """
+    reset_scene()
+    obj = make_scenario_curves(1, curve_type, 'TRIANGLE', falloff)[0]
+    scene = bpy.context.scene
+    points = addon.get_spline_points(obj.data.splines[0])
+
+    worst = 0.0
+    for index, point in enumerate(points):
+        # Blender sweep has no size to read axes from at zero radius
+        if point.radius < 0.01:
+            continue
+        ours = addon.get_point_rotation(bpy.context, scene, obj, index)
+        theirs = addon.get_blender_point_rotation(bpy.context, scene, obj, index)
+        angle = ours.rotation_difference(theirs).angle
+        worst = max(worst, min(angle, 2.0 * math.pi - angle))
+    return worst
+
+# Distance tolerance of simplify scenarios, and the evaluated error allowed on top of it
+SIMPLIFY_TOLERANCE = 1e-3
+SIMPLIFY_SLACK = 1e-5
+
+def simplify_scenarios():
+    for case in ('tilted', 'wave'):
+        yield 'simplify-' + case, case
+
+def make_simplify_curve(case, count=201):
+    """ Bezier curve with free handles, nearly straight but with tilted handles, or a wave """
+    x = np.linspace(0.0, 2.0, count)
+    if case == 'tilted':
+        co = np.stack((x, np.zeros(count), np.zeros(count)), axis=1)
+        angle = math.radians(3.0)
+        handle = np.array((math.cos(angle), math.sin(angle), 0.0)) * (x[1] - x[0]) / 3.0
+        left, right = co - handle, co + handle
+    else:
+        co = np.stack((x, 0.1 * np.sin(x * 4.0), np.zeros(count)), axis=1)
+        tangent = np.gradient(co, axis=0) / 3.0
+        left, right = co - tangent, co + tangent
+
+    curve = bpy.data.curves.new('simplify', 'CURVE')
+    curve.dimensions = '3D'
+    spline = curve.splines.new('BEZIER')
+    points = spline.bezier_points
+    points.add(count - 1)
+    for bp in points:
+        bp.handle_left_type = bp.handle_right_type = 'FREE'
+    for attr, values in (('co', co), ('handle_left', left), ('handle_right', right)):
+        points.foreach_set(attr, values.astype(np.float32).ravel())
+    return curve
+
+def sample_bezier_segments(addon, co, samples):
+    """ Evaluated points of consecutive bezier points, co as read_spline_points gives it """
+    ctrl = np.stack((co[:-1, 1], co[:-1, 2], co[1:, 0], co[1:, 1]), axis=1)
+    return addon.bezier_eval(ctrl, np.linspace(0.0, 1.0, samples + 1))[0].reshape(-1, 3)
+
+def polyline_distance(points, line, block=256):
+    """ Biggest distance from points to their nearest segment of line """
+    start = line[:-1]
+    edge = line[1:] - start
+    length2 = np.maximum(np.einsum('ij,ij->i', edge, edge), 1e-24)
+    worst = 0.0
+    for i in range(0, len(points), block):
+        rel = points[i:i + block, None] - start
+        t = np.clip(np.einsum('pij,ij->pi', rel, edge) / length2, 0.0, 1.0)
+        worst = max(worst, float(np.linalg.norm(rel - t[:, :, None] * edge, axis=2).min(axis=1).max()))
+    return worst
+
+def run_simplify_scenario(addon, case):
+    """ Point counts before and after, and biggest distance between evaluated curves.
+    Kept points don't move, so every simplified segment is compared to the original points it replaced """
+    reset_scene()
+    curve = make_simplify_curve(case)
+    original = addon.read_spline_points(curve.splines[0])[0].astype(np.float64)
+    before, after = addon.simplify_curve(curve, tolerance=SIMPLIFY_TOLERANCE)
+    simplified = addon.read_spline_points(curve.splines[0])[0].astype(np.float64)
+
+    kept = [int(np.flatnonzero(np.all(original[:, 1] == co, axis=1))[0]) for co in simplified[:, 1]]
+    worst = 0.0
+    for k, (a, b) in enumerate(zip(kept[:-1], kept[1:])):
+        old = sample_bezier_segments(addon, original[a:b + 1], 64)
+        new = sample_bezier_segments(addon, simplified[k:k + 2], 64 * (b - a))
+        worst = max(worst, polyline_distance(old, new), polyline_distance(new, old))
+    return before, after, worst
+
+# Thread counts whose conversions must give the same bytes, and modes converting on threads
+THREAD_COUNTS = (1, 4)
+THREAD_MODES = ('MERGE', 'LOD')
+
+# Enough curves for several merge batches, enough splines for several sweep batches
+THREAD_CURVE_COUNT = 40
+THREAD_SPLINE_COUNT = 16
+THREAD_RESOLUTION = 256
+
+def thread_scenarios():
+    for curve_type in CURVE_TYPES:
+        for mode in THREAD_MODES:
+            yield '-'.join(('threads', curve_type, mode)).lower(), curve_type, mode
+
+def add_spline_copies(curve, count):
+    """ Copies of the first bezier or nurbs spline side by side """
+    source = curve.splines[0]
+    points = [tuple(p.co) for p in (source.bezier_points if source.type == 'BEZIER' else source.points)]
+    for i in range(1, count + 1):
+        spline = curve.splines.new(source.type)
+        if source.type == 'BEZIER':
+            spline.bezier_points.add(len(points) - 1)
+            for bp, co in zip(spline.bezier_points, points):
+                bp.handle_left_type = bp.handle_right_type = 'AUTO'
+                bp.co = (co[0], co[1] + i * CURVE_SPACING, co[2])
+        else:
+            spline.points.add(len(points) - 1)
+            for p, co in zip(spline.points, points):
+                p.co = (co[0], co[1] + i * CURVE_SPACING, co[2], co[3])
+            spline.order_u = source.order_u
+
+def get_mesh_bytes(objs):
+    """ Vertices, faces, loops and materials of meshes as bytes, meshes in name order """
+    data = list()
+    for o in sorted(objs, key=lambda o: o.name):
+        mesh = o.data
+        for items, attr, dtype in (
+                (mesh.vertices, 'co', np.float32),
+                (mesh.loops, 'vertex_index', np.int32),
+                (mesh.polygons, 'loop_start', np.int32),
+                (mesh.polygons, 'material_index', np.int32)):
+            values = np.empty(len(items) * (3 if attr == 'co' else 1), dtype=dtype)
+            items.foreach_get(attr, values)
+            data.append(values.tobytes())
+    return b''.join(data)
+
+def run_thread_scenario(curve_type, mode):
+    """ True if conversion gives the same bytes whatever the thread count """
+    op_name = dict(CONVERT_OPERATORS)[mode]
+    settings = bpy.context.scene.bevel_curve_tools
+    results = list()
+    for threads in THREAD_COUNTS:
+        reset_scene()
+        settings.threads = threads
+        if mode == 'LOD':
+            objs = make_beveled_curves(1, curve_type, 'HALFCIRCLE', 'DUALTIP')
+            objs[0].data.resolution_u = THREAD_RESOLUTION
+            add_spline_copies(objs[0].data, THREAD_SPLINE_COUNT)
+        else: objs = make_beveled_curves(THREAD_CURVE_COUNT, curve_type, 'HALFCIRCLE', 'DUALTIP', CURVE_SPACING)
+        select_objects(objs)
+        getattr(bpy.ops.curve, op_name)()
+        results.append(get_mesh_bytes(o for o in bpy.context.scene.objects if o.type == 'MESH'))
+
+    settings.threads = 0
+    return all(r == results[0] for r in results) and len(results[0]) > 0
+
+def get_world_mesh(objs):
+    """ World space vertices and triangles of mesh objects, faces are fan triangulated """
+    verts = list()
+    tris = list()
+    num_faces = 0
+    offset = 0
+    for o in objs:
+        mesh = o.data
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+        mesh.vertices.foreach_get('co', co)
+        co = co.reshape(-1, 3)
+        mat = np.array(o.matrix_world, dtype=np.float64)
+        verts.append(np.dot(co, mat[:3, :3].T) + mat[:3, 3])
+
+        for poly in mesh.polygons:
+            vs = poly.vertices
+            for i in range(1, len(vs) - 1):
+                tris.append((vs[0] + offset, vs[i] + offset, vs[i + 1] + offset))
+        num_faces += len(mesh.polygons)
+        offset += len(co)
+
+    verts = np.concatenate(verts) if verts else np.zeros((0, 3))
+    tris = np.array(tris, dtype=np.int64).reshape(-1, 3)
+    return verts, tris, num_faces
+
+def mesh_volume(verts, tris):
+    """ Signed volume through the divergence theorem, closed outward meshes are positive """
+    if not len(tris):
+        return 0.0
+    a, b, c = verts[tris[:, 0]], verts[tris[:, 1]], verts[tris[:, 2]]
+    return float(np.einsum('ij,ij->i', a, np.cross(b, c)).sum() / 6.0)
+
+def directed_distance(points, targets):
+    """ Biggest distance from points to their nearest target """
+    if not len(points) or not len(targets):
+        return 0.0 if len(points) == len(targets) else float('inf')
+    tree = kdtree.KDTree(len(targets))
+    for i, co in enumerate(targets):
+        tree.insert(co, i)
+    tree.balance()
+    return max(tree.find(co)[2] for co in points)
+
+def hausdorff_distance(a, b):
+    return max(directed_distance(a, b), directed_distance(b, a))
+
+def run_scenario(shape, falloff, curve_type, op_name):
+    reset_scene()
+    objs = make_scenario_curves(CURVE_COUNT, curve_type, shape, falloff, CURVE_SPACING)
+    if objs is None or not has_operator(getattr(bpy.ops.curve, op_name)):
+        return None, None
+
+    # Bevel orientation comes from get_point_rotation
+    rotations = np.array([tuple(o.data.bevel_object.rotation_quaternion) for o in objs])
+
+    select_objects(objs)
+    elapsed, memory, undo = measure(getattr(bpy.ops.curve, op_name))
+
+    meshes = sorted((o for o in bpy.context.scene.objects if o.type == 'MESH'), key=lambda o: o.name)
+    verts, tris, num_faces = get_world_mesh(meshes)
+
+    return {
+        'objects' : len(meshes),
+        'verts' : len(verts),
+        'faces' : num_faces,
+        'bbox' : np.concatenate((verts.min(axis=0), verts.max(axis=0))) if len(verts) else np.zeros(6),
+        'volume' : mesh_volume(verts, tris),
+        'rotations' : rotations,
+        'time' : elapsed,
+        'memory' : memory,
+        }, verts
+
+def compare(result, verts, golden, golden_verts, args, rotations=True):
+    """ List of failure messages, empty if scenario passes """
+    failures = list()
+
+    if result['objects'] != golden['objects']:
+        failures.append('objects %d != %d' % (result['objects'], golden['objects']))
+
+    # Vertices right at the weld distance merge or not depending on float noise
+    for key in ('verts', 'faces'):
+        if abs(result[key] - golden[key]) > golden[key] * args.count_tolerance:
+            failures.append('%s %d != %d' % (key, result[key], golden[key]))
+
+    if not np.allclose(result['bbox'], golden['bbox'], atol=args.tolerance):
+        failures.append('bbox %s != %s' % (np.round(result['bbox'], 5), np.round(golden['bbox'], 5)))
+
+    volume_tol = max(abs(golden['volume']) * args.volume_tolerance, args.tolerance)
+    if abs(result['volume'] - golden['volume']) > volume_tol:
+        failures.append('volume %.6f != %.6f' % (result['volume'], golden['volume']))
+
+    # Same orientation whatever the quaternion sign
+    if rotations and (len(result['rotations']) != len(golden['rotations']) or np.any(
+            np.abs(np.einsum('ij,ij->i', result['rotations'], golden['rotations'])) < 1.0 - args.tolerance)):
+        failures.append('bevel rotation differs')
+
+    distance = hausdorff_distance(verts, golden_verts)
+    if distance > args.tolerance:
+        failures.append('hausdorff %.6f' % distance)
+
+    time_budget = golden['time'] * args.time_factor + args.time_slack
+    if result['time'] > time_budget:
+        failures.append('time %.3fs over budget %.3fs' % (result['time'], time_budget))
+
+    memory_budget = golden['memory'] * args.memory_factor + args.memory_slack
+    if result['memory'] > memory_budget:
+        failures.append('peak memory %dKB over budget %dKB' % (result['memory'], memory_budget))
+
+    return failures
+
+def load_goldens(path):
+    """ Returns {scenario name : (metrics, verts)} """
+    goldens = dict()
+    if not os.path.isfile(path):
+        return goldens
+
+    with np.load(path, allow_pickle=False) as data:
+        metrics = json.loads(str(data['metrics']))
+        for name, golden in metrics.items():
+            golden['bbox'] = np.array(golden['bbox'])
+            golden['rotations'] = np.array(golden['rotations']).reshape(-1, 4)
+            goldens[name] = (golden, data['verts_' + name])
+
+    return goldens
+
+def save_goldens(path, goldens):
+    metrics = dict()
+    arrays = dict()
+    for name, (golden, verts) in goldens.items():
+        metrics[name] = dict(golden, bbox=golden['bbox'].tolist(), rotations=golden['rotations'].tolist())
+        arrays['verts_' + name] = verts.astype(np.float32)
+
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, metrics=np.array(json.dumps(metrics, sort_keys=True)), **arrays)
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(description="Bevel Curve Tools regression suite")
+    parser.add_argument('--update', action='store_true', help="Store current results as references")
+    parser.add_argument('--only', nargs='*', default=None, help="Substrings of scenario names to run")
+    parser.add_argument('--goldens', default=GOLDENS_PATH)
+    parser.add_argument('--tolerance', type=float, default=1e-4, help="Distance tolerance")
+    parser.add_argument('--volume-tolerance', type=float, default=1e-3, help="Relative volume tolerance")
+    parser.add_argument('--count-tolerance', type=float, default=1e-2, help="Relative vertex and face count tolerance")
+    parser.add_argument('--time-factor', type=float, default=2.0, help="Time budget relative to reference")
+    parser.add_argument('--time-slack', type=float, default=0.05, help="Extra seconds on time budget")
+    parser.add_argument('--memory-factor', type=float, default=2.0, help="Memory budget relative to reference")
+    parser.add_argument('--memory-slack', type=int, default=16384, help="Extra KB on memory budget")
+    parser.add_argument('--output', default=os.path.join(ADDON_DIR, 'test_output.txt'))
+    args = parser.parse_args(argv)
+
+    addon = load_addon()
+    goldens = load_goldens(args.goldens)
+
+    lines = ['Blender %s' % bpy.app.version_string]
+    failed = 0
+    count = 0
+    skipped = 0
+
+    for name, mode, shape, falloff, curve_type, op_name in scenarios():
+        if args.only and not any(s in name for s in args.only):
+            continue
+        start = time.perf_counter()
+        result, verts = run_scenario(shape, falloff, curve_type, op_name)
+
+        # Older commits can't make references of modes and falloffs they don't have
+        if result is None and args.update:
+            skipped += 1
+            lines.append('%-7s %-36s' % ('SKIP', name))
+            print(lines[-1])
+            continue
+        count += 1
+
+        if result is None:
+            failures = ['this commit has no operator for it']
+            status = 'FAIL'
+        elif args.update:
+            goldens[name] = (result, verts)
+            status = 'UPDATED'
+        elif name not in goldens:
+            failures = ['no reference, run with --update on a known good commit']
+            status = 'FAIL'
+        else:
+            failures = compare(result, verts, goldens[name][0], goldens[name][1], args,
+                    rotations=curve_type in REFERENCE_ROTATION_TYPES)
+            status = 'FAIL' if failures else 'PASS'
+
+        line = '%-7s %-36s %7.3fs' % (status, name, time.perf_counter() - start)
+        if status == 'FAIL':
+            failed += 1
+            line += '  ' + '; '.join(failures)
+        lines.append(line)
+        print(line)
+
+    for name, curve_type, falloff in rotation_scenarios():
+        if args.update or (args.only and not any(s in name for s in args.only)):
+            continue
+        count += 1
+
+        start = time.perf_counter()
+        angle = run_rotation_scenario(addon, curve_type, falloff)
+        status = 'FAIL' if angle > ROTATION_TOLERANCE else 'PASS'
+        line = '%-7s %-36s %7.3fs' % (status, name, time.perf_counter() - start)
+        if status == 'FAIL':
+            failed += 1
+            line += '  rotation off by %.5f rad' % angle
+        lines.append(line)
+        print(line)
+
+    for name, curve_type, mode in thread_scenarios():
+        if args.update or (args.only and not any(s in name for s in args.only)):
+            continue
+        count += 1
+
+        start = time.perf_counter()
+        status = 'PASS' if run_thread_scenario(curve_type, mode) else 'FAIL'
+        line = '%-7s %-36s %7.3fs' % (status, name, time.perf_counter() - start)
+        if status == 'FAIL':
+            failed += 1
+            line += '  meshes differ between %s threads' % ' and '.join(map(str, THREAD_COUNTS))
+        lines.append(line)
+        print(line)
+
+    for name, case in simplify_scenarios():
+        if args.update or (args.only and not any(s in name for s in args.only)):
+            continue
+        count += 1
+
+        start = time.perf_counter()
+        before, after, distance = run_simplify_scenario(addon, case)
+        status = 'FAIL' if distance > SIMPLIFY_TOLERANCE + SIMPLIFY_SLACK else 'PASS'
+        line = '%-7s %-36s %7.3fs' % (status, name, time.perf_counter() - start)
+        if status == 'FAIL':
+            failed += 1
+            line += '  %d to %d points, evaluated curve off by %.5f' % (before, after, distance)
+        lines.append(line)
+        print(line)
+
+    if args.update:
+        save_goldens(args.goldens, goldens)
+        lines.append('%d references written to %s, %d skipped' % (count, args.goldens, skipped))
+    else: lines.append('%d passed, %d failed' % (count - failed, failed))
+    print(lines[-1])
+
+    with open(args.output, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()